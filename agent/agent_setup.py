@@ -1,11 +1,11 @@
 """ConnectOnion AI agent helper functions."""
 
 import asyncio
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
-from connectonion import Agent
-from shared.citation_generator import CitationGenerator
+from shared.citation_generator import CitationGenerator, load_page_stack
 
 # Resolve prompt path (supports prompt in agent/src/prompt.md or docs/prompt.md)
 _PROJECT_ROOT = Path(__file__).parent.parent
@@ -13,11 +13,14 @@ _PROMPT_CANDIDATES = [
     Path(__file__).parent / "src" / "prompt.md",
     _PROJECT_ROOT / "docs" / "prompt.md",
 ]
-for candidate in _PROMPT_CANDIDATES:
-    if candidate.exists():
-        _PROMPT_PATH = candidate
-        break
-else:  # pragma: no cover - should not happen in normal usage
+
+
+@lru_cache(maxsize=1)
+def _resolve_prompt_path() -> Path:
+    """Locate the system prompt on first use rather than at import time."""
+    for candidate in _PROMPT_CANDIDATES:
+        if candidate.exists():
+            return candidate
     raise FileNotFoundError("Prompt file not found. Expected at agent/src/prompt.md or docs/prompt.md")
 
 
@@ -25,9 +28,13 @@ async def generate_citation_ai_with_urls(
     query: str, urls: List[str], citation_gen: CitationGenerator
 ) -> str:
     """Use ConnectOnion agent to generate citations via natural language."""
+    from connectonion import Agent
+
+    # Tool registration resolves CitationGenerator's type hints, which reference bs4.
+    load_page_stack()
     temp_agent = Agent(
         name="citation_generator",
-        system_prompt=_PROMPT_PATH,
+        system_prompt=_resolve_prompt_path(),
         tools=[citation_gen],
         max_iterations=15,
         model="co/gpt-5-nano",
@@ -1,15 +1,29 @@
 """FastAPI application entry point for CiteEverythingForMe."""
 
-import io
-from typing import Dict, List
-
-from fastapi import APIRouter, FastAPI
+import asyncio
+import json
+import threading
+from typing import Any, Awaitable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import urlparse
+
+from fastapi import APIRouter, FastAPI, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-
-from agent.agent_setup import generate_citation_ai_with_urls
-from agent.models import CitationRequest
+from fastapi.responses import Response, StreamingResponse
+
+from agent.models import CitationRequest, MetadataRequest, SourceCitationRequest
+from agent.response_cache import (
+    BatchEntries,
+    batch_key,
+    etag_matches,
+    get_response_cache,
+    payload_etag,
+)
 from shared.citation_generator import CitationGenerator
+from shared.discovery import stream_source_citations
+from shared.fetching import FetchCancelled
+from shared.parsing import NO_TITLE, PageMetadata
+from shared.templates import STYLE_TEMPLATES_VERSION, style_templates
 
 app = FastAPI(title="CiteEverythingForMe API")
 
@@ -19,10 +33,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Content-Disposition", "ETag", "X-Citations-Partial"],
 )
 
 router = APIRouter(prefix="/api/citations", tags=["citations"])
 
+# Time kept back from a batch deadline to build and send the response.
+DEADLINE_HEADROOM_SECONDS = 0.2
+
+T = TypeVar("T")
+
 
 def _remove_html_tags(text: str) -> str:
     """Strip HTML tags and entities from citation strings."""
@@ -52,6 +72,11 @@ def _build_text_file_contents(citations: List[Dict[str, str]], style: str) -> st
         lines.append(f"Source {index}: {citation['url']}")
         lines.append(f"In-text citation: {citation['intext']}")
         lines.append(f"Reference list entry: {citation['reference']}")
+        if citation.get("status") == "partial":
+            lines.append(
+                "Note: Partial result. The batch deadline passed before this page was read, "
+                "so the citation is derived from its domain."
+            )
         lines.append("")
         lines.append("-" * 60)
         lines.append("")
@@ -81,6 +106,22 @@ def _extract_citation_entry(
     }
 
 
+def _partial_citation_entry(
+    generator: CitationGenerator, url: str, style_lower: str
+) -> Dict[str, str]:
+    """Create a domain-derived fallback entry for a URL cut off by the batch deadline."""
+    domain = urlparse(url).netloc
+    metadata = PageMetadata(title=NO_TITLE, author=generator._author_from_domain(domain))
+    access_date = generator._get_access_date(url)
+    _, citation = generator._format_citation(style_lower, metadata, domain, url, access_date)
+    return {
+        "url": url,
+        "intext": _remove_html_tags(citation["intext"]),
+        "reference": _remove_html_tags(citation["reference"]),
+        "status": "partial",
+    }
+
+
 def _record_generation_error(url: str, error: Exception) -> Dict[str, str]:
     """Create an entry describing a generation failure for a specific URL."""
     return {
@@ -94,43 +135,231 @@ async def _generate_with_ai(
     url: str, style: str, generator: CitationGenerator
 ) -> None:
     """Generate a citation via the ConnectOnion agent for a single URL."""
+    # Imported lazily so deterministic-only deployments never load the AI stack.
+    from agent.agent_setup import generate_citation_ai_with_urls
+
     query = f"Generate a {style.upper()} citation for: {url}"
     await generate_citation_ai_with_urls(query, [url], generator)
 
 
-@router.post("/generate")
-async def download_citations_text_file(req: CitationRequest):
-    """Generate citations for provided URLs and return them as a text file."""
-    generator = CitationGenerator()
-    compiled_citations: List[Dict[str, str]] = []
-    style_lower = (req.style or "unsw").lower()
-
-    for url in req.urls:
-        url_str = str(url)
-
-        if req.use_ai:
+def _generate_deterministic(
+    generator: CitationGenerator, urls: List[str], style: str
+) -> Dict[str, Exception]:
+    """Generate citations concurrently via the host-aware scheduler; return per-URL errors."""
+    errors: Dict[str, Exception] = {}
+    batch = generator.scheduler.run(urls, lambda url: generator.generate_citation(url, style=style))
+    try:
+        for url, future in batch:
+            error: Optional[BaseException] = future.exception()
+            if isinstance(error, Exception):
+                errors[url] = error
+            if generator.cancel is not None and generator.cancel.is_set():
+                break
+    finally:
+        batch.close()
+    return errors
+
+
+async def _generate_entries(
+    generator: CitationGenerator, url_strs: List[str], style: str, use_ai: bool
+) -> Tuple[BatchEntries, bool]:
+    """Generate one citation entry per URL; also report whether every URL succeeded.
+
+    A URL whose page could not be fetched still gets a domain-derived citation,
+    but does not count as a success.
+    """
+    style_lower = style.lower()
+    errors: Dict[str, Exception] = {}
+
+    if use_ai:
+        for url_str in url_strs:
             try:
-                await _generate_with_ai(url_str, req.style, generator)
+                await _generate_with_ai(url_str, style, generator)
             except Exception as exc:  # noqa: BLE001 - continue processing others
-                compiled_citations.append(_record_generation_error(url_str, exc))
-                continue
+                errors[url_str] = exc
+    else:
+        # Fetching and parsing block, so keep them off the event loop.
+        errors = await run_in_threadpool(_generate_deterministic, generator, url_strs, style)
+
+    entries: BatchEntries = {}
+    for url_str in url_strs:
+        if url_str in errors:
+            entries[url_str] = _record_generation_error(url_str, errors[url_str])
         else:
-            generator.generate_citation(url_str, style=req.style)
+            entries[url_str] = _extract_citation_entry(generator, url_str, style_lower, style)
+    complete = not errors and not any(url_str in generator.fetch_errors for url_str in url_strs)
+    return entries, complete
+
+
+async def _await_within_deadline(
+    generator: CitationGenerator, work: Awaitable[T], deadline_seconds: Optional[float]
+) -> Optional[T]:
+    """Await ``work``, giving up once ``deadline_seconds`` pass.
+
+    At the deadline the generator's in-flight fetches are cancelled and None
+    is returned; the abandoned work unwinds in the background.
+    """
+    task = asyncio.ensure_future(work)
+    if deadline_seconds is None:
+        return await task
+
+    budget = max(0.0, deadline_seconds - DEADLINE_HEADROOM_SECONDS)
+    try:
+        # Shielded: awaiting a cancelled worker thread would block until it returns.
+        return await asyncio.wait_for(asyncio.shield(task), budget)
+    except asyncio.TimeoutError:
+        if generator.cancel is not None:
+            generator.scheduler.cancel(generator.cancel)
+        task.cancel()
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return None
+
+
+async def _generate_within_deadline(
+    url_strs: List[str], style: str, use_ai: bool, deadline_seconds: Optional[float]
+) -> Tuple[BatchEntries, bool]:
+    """Run :func:`_generate_entries`, cutting it short once ``deadline_seconds`` pass.
+
+    URLs that had not finished by the deadline get a domain-derived citation
+    marked as partial.
+    """
+    generator = CitationGenerator(cancel=threading.Event())
+    work = _generate_entries(generator, url_strs, style, use_ai)
+    result = await _await_within_deadline(generator, work, deadline_seconds)
+    if result is not None:
+        return result
+
+    style_lower = style.lower()
+    entries: BatchEntries = {}
+    for url_str in url_strs:
+        if style_lower in generator.citations.get(url_str, {}):
+            entries[url_str] = _extract_citation_entry(generator, url_str, style_lower, style)
+        else:
+            entries[url_str] = _partial_citation_entry(generator, url_str, style_lower)
+    return entries, False
+
 
-        compiled_citations.append(
-            _extract_citation_entry(generator, url_str, style_lower, req.style)
+@router.post("/generate")
+async def download_citations_text_file(
+    req: CitationRequest, if_none_match: Optional[str] = Header(default=None)
+):
+    """Generate citations for provided URLs and return them as a text file.
+
+    Identical batches are answered from the response cache, and an
+    ``If-None-Match`` carrying the current ``ETag`` gets ``304 Not Modified``.
+    With ``deadline_seconds`` the response is sent within that budget, with
+    partial citations for URLs that did not finish in time.
+    """
+    style_lower = (req.style or "unsw").lower()
+    url_strs = [str(url) for url in req.urls]
+
+    cache = get_response_cache()
+    key = batch_key(url_strs, style_lower, req.use_ai)
+    entries = cache.get(key)
+    if entries is None:
+        entries, complete = await _generate_within_deadline(
+            url_strs, req.style, req.use_ai, req.deadline_seconds
         )
+        if complete:
+            # Failed or partial batches are not cached so a retry gets a fresh attempt.
+            cache.put(key, entries)
+
+    compiled_citations = [entries[url_str] for url_str in url_strs]
+    payload = _build_text_file_contents(compiled_citations, style_lower).encode("utf-8")
+    etag = payload_etag(payload)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="citations_{style_lower}_{len(compiled_citations)}.txt"',
+        "ETag": etag,
+    }
+    partial = sum(entry.get("status") == "partial" for entry in compiled_citations)
+    if partial:
+        headers["X-Citations-Partial"] = str(partial)
+    return Response(content=payload, media_type="text/plain", headers=headers)
+
+
+def _collect_metadata(
+    generator: CitationGenerator, urls: List[str], records: Dict[str, Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Fill ``records`` with a metadata record per URL as fetches complete.
+
+    Stops writing once the generator is cancelled, so URLs still in flight at
+    the deadline fall through to the caller's partial records.
+    """
+    batch = generator.scheduler.run(urls, generator._metadata_record)
+    try:
+        for url, future in batch:
+            if generator.cancel is not None and generator.cancel.is_set():
+                break
+            error: Optional[BaseException] = future.exception()
+            if error is None:
+                records[url] = future.result()
+            elif not isinstance(error, FetchCancelled):
+                records[url] = {
+                    **generator._metadata_record(url, partial=True),
+                    "partial": False,
+                    "error": str(error),
+                }
+    finally:
+        batch.close()
+    return records
+
+
+@router.post("/metadata")
+async def citation_metadata(req: MetadataRequest):
+    """Return the extracted metadata per URL so clients can render any style locally.
+
+    Each record holds ``title`` (None when unknown), ``author``, ``domain``,
+    ``sponsor`` (UNSW sponsor class), ``accessed`` (ISO date), ``error`` and
+    ``partial``. Render them with the templates from ``GET /templates``; the
+    response names the ``templates_version`` its records are meant for.
+    """
+    url_strs = [str(url) for url in req.urls]
+    generator = CitationGenerator(cancel=threading.Event())
+    records: Dict[str, Dict[str, Any]] = {}
+    # Fetching and parsing block, so keep them off the event loop.
+    work = run_in_threadpool(_collect_metadata, generator, list(dict.fromkeys(url_strs)), records)
+    await _await_within_deadline(generator, work, req.deadline_seconds)
 
-    text_payload = _build_text_file_contents(compiled_citations, style_lower)
-    file_like = io.BytesIO(text_payload.encode("utf-8"))
+    return {
+        "templates_version": STYLE_TEMPLATES_VERSION,
+        "records": [
+            records.get(url_str) or generator._metadata_record(url_str, partial=True)
+            for url_str in url_strs
+        ],
+    }
 
-    return StreamingResponse(
-        file_like,
-        media_type="text/plain",
-        headers={
-            "Content-Disposition": f'attachment; filename="citations_{style_lower}_{len(compiled_citations)}.txt"'
-        },
-    )
+
+@router.get("/templates")
+async def citation_style_templates() -> Dict[str, Any]:
+    """Return the versioned style templates that render ``/metadata`` records."""
+    return style_templates()
+
+
+def _ndjson_events(events: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode discovery events as newline-delimited JSON with HTML stripped from citations."""
+    for event in events:
+        if event["event"] == "citation":
+            event = {
+                **event,
+                "intext": _remove_html_tags(event["intext"]),
+                "reference": _remove_html_tags(event["reference"]),
+            }
+        yield (json.dumps(event) + "\n").encode("utf-8")
+
+
+@router.post("/from-source")
+async def stream_citations_from_source(req: SourceCitationRequest):
+    """Cite every link in a sitemap, RSS/Atom feed or reading-list page.
+
+    Links are cited while the source is still being parsed, and progress and
+    results stream back as newline-delimited JSON events.
+    """
+    generator = CitationGenerator()
+    events = stream_source_citations(generator, str(req.source_url), req.style, req.max_links)
+    return StreamingResponse(_ndjson_events(events), media_type="application/x-ndjson")
 
 
 @router.get("/styles")
@@ -153,6 +382,9 @@ async def root():
             "docs": "/docs",
             "redoc": "/redoc",
             "generate_citations": "POST /api/citations/generate (returns .txt file)",
+            "citations_from_source": "POST /api/citations/from-source (streams NDJSON)",
+            "citation_metadata": "POST /api/citations/metadata (structured JSON per URL)",
+            "style_templates": "GET /api/citations/templates",
             "list_styles": "GET /api/citations/styles",
         },
     }
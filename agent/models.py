@@ -1,18 +1,18 @@
-"""Request model for the citation generation API."""
+"""Request models for the citation generation API."""
 
-from typing import List, Literal
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, HttpUrl, field_validator
 
 CitationStyle = Literal["harvard", "mla", "chicago", "apa", "ieee", "vancouver", "unsw"]
 
 
-class CitationRequest(BaseModel):
-    """Incoming payload for citation generation requests."""
+class MetadataRequest(BaseModel):
+    """Incoming payload for structured page metadata requests."""
 
     urls: List[HttpUrl]
-    style: CitationStyle = "unsw"  # Default to UNSW style
-    use_ai: bool = False
+    # Overall time budget in seconds; unfinished URLs then get partial results.
+    deadline_seconds: Optional[float] = None
 
     @field_validator("urls")
     @classmethod
@@ -24,3 +24,37 @@ class CitationRequest(BaseModel):
             raise ValueError("Maximum 50 URLs allowed per request")
         return value
 
+    @field_validator("deadline_seconds")
+    @classmethod
+    def validate_deadline_seconds(cls, value: Optional[float]) -> Optional[float]:
+        """Ensure the batch deadline, if given, is positive and at most ten minutes."""
+        if value is not None and value <= 0:
+            raise ValueError("deadline_seconds must be positive")
+        if value is not None and value > 600:
+            raise ValueError("deadline_seconds may be at most 600")
+        return value
+
+
+class CitationRequest(MetadataRequest):
+    """Incoming payload for citation generation requests."""
+
+    style: CitationStyle = "unsw"  # Default to UNSW style
+    use_ai: bool = False
+
+
+class SourceCitationRequest(BaseModel):
+    """Incoming payload for citing every link in a sitemap, feed or reading-list page."""
+
+    source_url: HttpUrl
+    style: CitationStyle = "unsw"
+    max_links: int = 200
+
+    @field_validator("max_links")
+    @classmethod
+    def validate_max_links(cls, value: int) -> int:
+        """Ensure between 1 and 1000 links are requested."""
+        if value < 1:
+            raise ValueError("max_links must be at least 1")
+        if value > 1000:
+            raise ValueError("Maximum 1000 links allowed per source")
+        return value
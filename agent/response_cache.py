@@ -0,0 +1,109 @@
+"""Whole-request result cache for repeated ``/generate`` batches.
+
+The extension often re-posts an identical URL list and style (a second click
+on download, a retry after a dropped connection). Batches are keyed by the
+canonical URL set, the style, the AI flag and the access date, since every
+citation style prints the day the page was viewed, so a cached batch is never
+served with a stale "accessed" date. Responses carry an ``ETag`` derived from
+the rendered payload so clients can revalidate with ``If-None-Match``.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+# Seconds a rendered batch is reused (0 disables the cache).
+RESPONSE_CACHE_TTL = float(os.environ.get("CITE_RESPONSE_CACHE_TTL", "600"))
+# Distinct batches kept; the least recently used are evicted first.
+RESPONSE_CACHE_SIZE = int(os.environ.get("CITE_RESPONSE_CACHE_SIZE", "256"))
+
+# Citation entries for one batch, keyed by URL.
+BatchEntries = Dict[str, Dict[str, str]]
+
+
+def batch_key(
+    urls: Iterable[str], style: str, use_ai: bool, access_day: Optional[date] = None
+) -> str:
+    """Hash a batch by its canonical URL set, style, AI flag and access day."""
+    material = {
+        "urls": sorted(set(urls)),
+        "style": style.lower(),
+        "use_ai": bool(use_ai),
+        "day": (access_day or date.today()).isoformat(),
+    }
+    encoded = json.dumps(material, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def payload_etag(payload: bytes) -> str:
+    """Return a strong ``ETag`` value for a rendered response body."""
+    return f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Return True if an ``If-None-Match`` header value covers ``etag``."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Bounded, expiring LRU of citation entries per batch key."""
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, BatchEntries]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[BatchEntries]:
+        """Return the cached entries for ``key`` if they have not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, entries = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entries
+
+    def put(self, key: str, entries: BatchEntries) -> None:
+        """Remember the citation entries generated for batch ``key``."""
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, dict(entries))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every cached batch."""
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache configured from the environment."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
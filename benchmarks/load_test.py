@@ -0,0 +1,411 @@
+"""Load and soak test harness for ``POST /api/citations/generate``.
+
+Starts the FastAPI app in a child process next to a local stub origin server
+that serves the HTML fixture corpus (``tests/fixtures/pages``), then drives
+batches of URLs at the API from many concurrent simulated users. No network
+access is needed: every cited URL points at the stub origin, spread across
+several loopback addresses (127.0.0.1, 127.0.0.2, ...) so the per-host
+scheduler sees distinct hosts.
+
+The stub origin misbehaves on request, per URL:
+
+- ``--latency``: delay before every response
+- ``--drip-fraction``: bodies trickled out in small chunks
+- ``--throttle-fraction``: first hit answers ``429`` with ``Retry-After``
+- ``--timeout-fraction``: a dedicated tarpit host that never answers in time
+
+Reported metrics: throughput, p50/p95/p99 batch latency, event-loop lag of the
+app process and its RSS over the run. Usage::
+
+    python benchmarks/load_test.py --users 50 --duration 60
+    python benchmarks/load_test.py --users 200 --duration 1800 --report-interval 60  # soak
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = PROJECT_ROOT / "tests" / "fixtures" / "pages"
+STATS_PATH = "/__loadtest/stats"
+LAG_PROBE_INTERVAL = 0.05
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, not current
+
+
+# --------------------------------------------------------------------------- stub origin
+
+
+class StubOriginHandler(BaseHTTPRequestHandler):
+    """Serve fixture pages, misbehaving according to the query string."""
+
+    pages: Dict[str, bytes] = {}
+    hits: Dict[str, int] = {}
+    hits_lock = threading.Lock()
+
+    def log_message(self, format, *args):  # noqa: A002 - silence per-request logging
+        pass
+
+    def do_GET(self):  # noqa: N802 - http.server naming
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        body = self.pages.get(parsed.path.rsplit("/", 1)[-1])
+        time.sleep(float(params.get("latency", 0)))
+
+        if body is None:
+            self._respond(404, b"<html><head><title>Not Found</title></head></html>")
+            return
+
+        mode = params.get("mode", "")
+        if mode == "timeout":
+            time.sleep(float(params.get("hang", 30)))
+        elif mode == "429":
+            key = f"{self.headers.get('Host')}{self.path}"
+            with self.hits_lock:
+                self.hits[key] = self.hits.get(key, 0) + 1
+                first_hit = self.hits[key] == 1
+            if first_hit:
+                self._respond(429, b"Too Many Requests", {"Retry-After": params.get("retry", "1")})
+                return
+        elif mode == "drip":
+            self._drip(body, int(params.get("chunk", 512)), float(params.get("delay", 0.02)))
+            return
+
+        self._respond(200, body)
+
+    def _respond(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _drip(self, body: bytes, chunk: int, delay: float) -> None:
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for start in range(0, len(body), chunk):
+                self.wfile.write(body[start : start + chunk])
+                self.wfile.flush()
+                time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_stub_origin() -> ThreadingHTTPServer:
+    """Start the stub origin on all interfaces and an ephemeral port."""
+    StubOriginHandler.pages = {path.name: path.read_bytes() for path in FIXTURES.glob("*.html")}
+    ThreadingHTTPServer.daemon_threads = True
+    server = ThreadingHTTPServer(("0.0.0.0", 0), StubOriginHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --------------------------------------------------------------------------- app process
+
+
+def serve_app(port: int) -> None:
+    """Child-process entry point: run the app with an event-loop lag probe."""
+    import uvicorn
+
+    from agent.main import app
+
+    lag_samples: deque = deque(maxlen=100_000)
+
+    async def stats() -> dict:
+        samples = list(lag_samples)
+        lag_samples.clear()
+        return {"lag_ms": samples, "rss_mb": current_rss_mb()}
+
+    app.add_api_route(STATS_PATH, stats, methods=["GET"], include_in_schema=False)
+
+    async def probe_lag() -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag_samples.append((time.perf_counter() - start - LAG_PROBE_INTERVAL) * 1000)
+
+    async def main() -> None:
+        server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        probe = asyncio.ensure_future(probe_lag())
+        try:
+            await server.serve()
+        finally:
+            probe.cancel()
+
+    asyncio.run(main())
+
+
+def start_app(port: int, fetch_timeout: float, workdir: str) -> subprocess.Popen:
+    """Launch the app in a child process and wait until it answers ``/health``."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    env["CITE_FETCH_TIMEOUT"] = str(fetch_timeout)
+    # The generator appends to citations_output.txt in its working directory.
+    process = subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--serve-app", "--app-port", str(port)],
+        cwd=workdir,
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                return process
+        except (urllib.error.URLError, ConnectionError):
+            if process.poll() is not None:
+                raise RuntimeError("app process exited during startup")
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("app did not become healthy within 30 seconds")
+
+
+def fetch_app_stats(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{STATS_PATH}", timeout=10) as response:
+        return json.load(response)
+
+
+# --------------------------------------------------------------------------- load generation
+
+
+class BatchFactory:
+    """Build citation batches pointing at the stub origin with a configurable fault mix."""
+
+    def __init__(self, args: argparse.Namespace, origin_port: int):
+        self.args = args
+        self.origin_port = origin_port
+        self.pages = sorted(path.name for path in FIXTURES.glob("*.html"))
+        self.counter = count()
+        self.random = random.Random(args.seed)
+        self.lock = threading.Lock()
+
+    def _url(self) -> str:
+        args = self.args
+        with self.lock:
+            serial = next(self.counter)
+            roll = self.random.random()
+            page = self.random.choice(self.pages)
+            host = f"127.0.0.{self.random.randint(1, args.hosts)}"
+
+        params = [f"n={serial}"]  # unique URLs so caches do not hide the work
+        if args.latency:
+            params.append(f"latency={args.latency}")
+        if roll < args.timeout_fraction:
+            host = f"127.0.0.{args.hosts + 1}"  # tarpit host
+            params.append(f"mode=timeout&hang={args.fetch_timeout * 2}")
+        elif roll < args.timeout_fraction + args.throttle_fraction:
+            params.append("mode=429&retry=1")
+        elif roll < args.timeout_fraction + args.throttle_fraction + args.drip_fraction:
+            params.append("mode=drip")
+        return f"http://{host}:{self.origin_port}/pages/{page}?{'&'.join(params)}"
+
+    def batch(self) -> List[str]:
+        return [self._url() for _ in range(self.args.batch_size)]
+
+
+class Recorder:
+    """Thread-safe accumulator of batch outcomes for one reporting window."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.urls = 0
+        self.errors = 0
+
+    def record(self, seconds: float, urls: int, ok: bool) -> None:
+        with self.lock:
+            self.latencies.append(seconds)
+            self.urls += urls
+            self.errors += 0 if ok else 1
+
+    def drain(self) -> "Recorder":
+        with self.lock:
+            snapshot = Recorder()
+            snapshot.latencies, self.latencies = self.latencies, []
+            snapshot.urls, self.urls = self.urls, 0
+            snapshot.errors, self.errors = self.errors, 0
+            return snapshot
+
+
+def run_user(
+    app_port: int, factory: BatchFactory, recorder: Recorder, stop: threading.Event, style: str
+) -> None:
+    url = f"http://127.0.0.1:{app_port}/api/citations/generate"
+    while not stop.is_set():
+        batch = factory.batch()
+        payload = json.dumps({"urls": batch, "style": style, "use_ai": False}).encode("utf-8")
+        request = urllib.request.Request(
+            url, data=payload, headers={"Content-Type": "application/json"}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            ok = False
+        recorder.record(time.perf_counter() - start, len(batch), ok)
+
+
+def report(
+    label: str, window: Recorder, elapsed: float, lag_ms: List[float], rss_mb: float
+) -> None:
+    latencies = window.latencies
+    print(
+        f"[{label}] batches {len(latencies)} ({window.errors} failed), "
+        f"{len(latencies) / elapsed:.2f} batch/s, {window.urls / elapsed:.1f} url/s | "
+        f"latency p50 {percentile(latencies, 50):.2f}s p95 {percentile(latencies, 95):.2f}s "
+        f"p99 {percentile(latencies, 99):.2f}s | "
+        f"loop lag p50 {percentile(lag_ms, 50):.1f}ms p99 {percentile(lag_ms, 99):.1f}ms "
+        f"max {max(lag_ms, default=0.0):.1f}ms | RSS {rss_mb:.1f}MB",
+        flush=True,
+    )
+
+
+def run_load(args: argparse.Namespace) -> None:
+    origin = start_stub_origin()
+    origin_port = origin.server_address[1]
+    with tempfile.TemporaryDirectory() as workdir:
+        app = start_app(args.app_port, args.fetch_timeout, workdir)
+        try:
+            baseline_rss = fetch_app_stats(args.app_port)["rss_mb"]
+            print(
+                f"App on :{args.app_port}, stub origin on :{origin_port}, {args.users} users x "
+                f"{args.batch_size} URLs for {args.duration}s (baseline RSS {baseline_rss:.1f}MB)",
+                flush=True,
+            )
+            factory = BatchFactory(args, origin_port)
+            recorder = Recorder()
+            stop = threading.Event()
+            users = [
+                threading.Thread(
+                    target=run_user,
+                    args=(args.app_port, factory, recorder, stop, args.style),
+                    daemon=True,
+                )
+                for _ in range(args.users)
+            ]
+            started = time.monotonic()
+            for user in users:
+                user.start()
+
+            total = Recorder()
+            all_lag: List[float] = []
+            peak_rss = rss = baseline_rss
+            window_start = started
+            while time.monotonic() - started < args.duration:
+                time.sleep(
+                    min(
+                        args.report_interval, max(0.0, args.duration - (time.monotonic() - started))
+                    )
+                )
+                stats = fetch_app_stats(args.app_port)
+                rss, lag = stats["rss_mb"], stats["lag_ms"]
+                peak_rss = max(peak_rss, rss)
+                all_lag.extend(lag)
+                window = recorder.drain()
+                total.latencies.extend(window.latencies)
+                total.urls += window.urls
+                total.errors += window.errors
+                now = time.monotonic()
+                report(f"{now - started:6.0f}s", window, now - window_start, lag, rss)
+                window_start = now
+
+            stop.set()
+            for user in users:
+                user.join(timeout=args.fetch_timeout * 4 + 60)
+            leftover = recorder.drain()
+            total.latencies.extend(leftover.latencies)
+            total.urls += leftover.urls
+            total.errors += leftover.errors
+
+            print("-" * 100)
+            report("total", total, time.monotonic() - started, all_lag, rss)
+            print(
+                f"RSS baseline {baseline_rss:.1f}MB, peak {peak_rss:.1f}MB, growth {rss - baseline_rss:+.1f}MB"
+            )
+        finally:
+            app.terminate()
+            app.wait(timeout=30)
+            origin.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--batch-size", type=int, default=50, help="URLs per request (max 50)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to apply load")
+    parser.add_argument("--report-interval", type=float, default=10, help="seconds between reports")
+    parser.add_argument("--style", default="unsw", help="citation style to request")
+    parser.add_argument("--hosts", type=int, default=4, help="distinct healthy origin hosts")
+    parser.add_argument("--latency", type=float, default=0.05, help="origin delay per response (s)")
+    parser.add_argument(
+        "--drip-fraction", type=float, default=0.1, help="share of slow-drip bodies"
+    )
+    parser.add_argument(
+        "--throttle-fraction", type=float, default=0.05, help="share answering 429 first"
+    )
+    parser.add_argument(
+        "--timeout-fraction", type=float, default=0.02, help="share sent to the tarpit host"
+    )
+    parser.add_argument(
+        "--fetch-timeout", type=float, default=2.0, help="CITE_FETCH_TIMEOUT for the app"
+    )
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for the URL mix")
+    parser.add_argument("--app-port", type=int, default=8765, help="port for the app under test")
+    parser.add_argument("--serve-app", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_app:
+        serve_app(args.app_port)
+    else:
+        run_load(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare parse time per page across the parser backends.
+
+Runs ``parse_page_metadata`` over the HTML fixture corpus plus a synthesized
+multi-megabyte page and prints the mean time per page for each backend, with
+the speed-up relative to BeautifulSoup's ``html.parser``. Usage::
+
+    python benchmarks/parse_backends.py
+    python benchmarks/parse_backends.py --repeat 20 --large-kb 4096
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from shared.parsing import PARSER_BACKENDS, parse_page_metadata  # noqa: E402
+
+FIXTURES = PROJECT_ROOT / "tests" / "fixtures" / "pages"
+
+
+def build_large_page(size_kb: int) -> bytes:
+    """Return a page of roughly ``size_kb`` KB with metadata in the head."""
+    paragraph = (
+        "<div class='story'><p>Researchers published new findings on coastal erosion "
+        "and sediment transport along the eastern seaboard.</p></div>\n"
+    )
+    body = paragraph * max(1, (size_kb * 1024) // len(paragraph))
+    return (
+        "<html><head><title>Large Report</title>"
+        '<meta name="author" content="Research Desk"></head>'
+        f"<body>{body}</body></html>"
+    ).encode("utf-8")
+
+
+def load_pages(large_kb: int) -> List[Tuple[str, bytes]]:
+    pages = [(path.name, path.read_bytes()) for path in sorted(FIXTURES.glob("*.html"))]
+    pages.append((f"large_{large_kb}kb.html", build_large_page(large_kb)))
+    return pages
+
+
+def time_backend(backend: str, content: bytes, repeat: int) -> float:
+    """Return the mean seconds per parse of ``content`` with ``backend``."""
+    parse_page_metadata(content, "www.example.com", backend=backend)  # warm up imports/caches
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse_page_metadata(content, "www.example.com", backend=backend)
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="parses per page and backend")
+    parser.add_argument("--large-kb", type=int, default=2048, help="size of the synthesized page")
+    args = parser.parse_args()
+
+    pages = load_pages(args.large_kb)
+    header = f"{'page':<32}" + "".join(f"{backend:>14}" for backend in PARSER_BACKENDS)
+    print(header + f"{'fast speed-up':>16}")
+    print("-" * (len(header) + 16))
+
+    totals: Dict[str, float] = {backend: 0.0 for backend in PARSER_BACKENDS}
+    for name, content in pages:
+        repeat = 1 if len(content) > 512 * 1024 else args.repeat
+        timings = {backend: time_backend(backend, content, repeat) for backend in PARSER_BACKENDS}
+        for backend, seconds in timings.items():
+            totals[backend] += seconds
+        cells = "".join(f"{timings[backend] * 1000:>12.2f}ms" for backend in PARSER_BACKENDS)
+        print(f"{name:<32}{cells}{timings['html.parser'] / timings['fast']:>15.1f}x")
+
+    print("-" * (len(header) + 16))
+    cells = "".join(f"{totals[backend] * 1000:>12.2f}ms" for backend in PARSER_BACKENDS)
+    print(f"{'total':<32}{cells}{totals['html.parser'] / totals['fast']:>15.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measure cold-start import time and memory for the FastAPI backend.
+
+Each sample runs in a fresh interpreter so module caches never leak between
+runs. Usage::
+
+    python benchmarks/startup_time.py            # lazy (default) import path
+    python benchmarks/startup_time.py --eager    # also load the AI/parser stacks
+    python benchmarks/startup_time.py --runs 20 --module shared.citation_generator
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that deterministic-only deployments should never need at boot.
+HEAVY_MODULES = ["connectonion", "bs4", "requests", "lxml"]
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+{eager}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "max_rss_kb": rss_kb, "heavy": heavy}}))
+"""
+
+_EAGER_IMPORTS = """
+from shared.citation_generator import load_page_stack
+load_page_stack()
+try:
+    import connectonion  # noqa: F401
+except ImportError:
+    pass
+"""
+
+
+def run_sample(module: str, eager: bool) -> dict:
+    """Import ``module`` in a fresh interpreter and return its measurements."""
+    code = _PROBE.format(
+        module=module,
+        eager=_EAGER_IMPORTS if eager else "",
+        heavy=HEAVY_MODULES,
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--module", default="agent.main", help="module to import (default: agent.main)"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=10, help="number of fresh interpreters to sample"
+    )
+    parser.add_argument("--eager", action="store_true", help="also import the AI and parser stacks")
+    args = parser.parse_args()
+
+    samples = [run_sample(args.module, args.eager) for _ in range(args.runs)]
+    seconds = [sample["seconds"] * 1000 for sample in samples]
+    rss_mb = [sample["max_rss_kb"] / 1024 for sample in samples]
+
+    print(f"Module: {args.module} ({'eager' if args.eager else 'lazy'} imports, {args.runs} runs)")
+    print(
+        f"Import time ms: median {statistics.median(seconds):.1f}, min {min(seconds):.1f}, max {max(seconds):.1f}"
+    )
+    print(f"Peak RSS MB:    median {statistics.median(rss_mb):.1f}")
+    print(f"Heavy modules loaded: {', '.join(samples[-1]['heavy']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
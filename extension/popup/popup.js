@@ -5,6 +5,79 @@ const addBtn = document.getElementById("add-btn");
 const generateBtn = document.getElementById("generate-btn");
 const clearBtn = document.getElementById("clear-btn");
 
+const API_BASE = "http://localhost:8000/api/citations";
+// The backend answers within this budget, citing unfinished pages from their domain.
+const GENERATE_DEADLINE_SECONDS = 60;
+
+function todayIso() {
+  const now = new Date();
+  const pad = (value) => String(value).padStart(2, "0");
+  return `${now.getFullYear()}-${pad(now.getMonth() + 1)}-${pad(now.getDate())}`;
+}
+
+async function postJson(path, payload, headers = {}) {
+  const body = JSON.stringify(payload);
+  const res = await fetch(`${API_BASE}${path}`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", ...headers },
+    body,
+  });
+  if (!res.ok && res.status !== 304) {
+    throw new Error(`Backend returned ${res.status}`);
+  }
+  return res;
+}
+
+// Server-side rendering (needed for AI mode), revalidating the last download by ETag.
+async function generateOnServer(urls, style) {
+  const payload = { urls, style, use_ai: true, deadline_seconds: GENERATE_DEADLINE_SECONDS };
+  const body = JSON.stringify(payload);
+  const { lastDownload } = await chrome.storage.local.get("lastDownload");
+  const cached = lastDownload?.body === body ? lastDownload : null;
+
+  const res = await postJson("/generate", payload, cached ? { "If-None-Match": cached.etag } : {});
+  if (res.status === 304 && cached) {
+    return cached.text;
+  }
+  const text = await res.text();
+  const etag = res.headers.get("ETag");
+  if (etag) {
+    await chrome.storage.local.set({ lastDownload: { body, etag, text } });
+  }
+  return text;
+}
+
+// Fetch page metadata once per URL list and day, then render any style locally.
+async function generateLocally(urls, style) {
+  const key = JSON.stringify(urls);
+  const { metadataCache, styleTemplates } = await chrome.storage.local.get([
+    "metadataCache",
+    "styleTemplates",
+  ]);
+
+  let metadata = metadataCache;
+  if (metadata?.key !== key || metadata.records[0]?.accessed !== todayIso()) {
+    const res = await postJson("/metadata", { urls, deadline_seconds: GENERATE_DEADLINE_SECONDS });
+    metadata = { key, ...(await res.json()) };
+    // Keep failed or cut-off pages out of the cache so the next run asks again.
+    if (!metadata.records.some((record) => record.partial || record.error)) {
+      await chrome.storage.local.set({ metadataCache: metadata });
+    }
+  }
+
+  let templates = styleTemplates;
+  if (templates?.version !== metadata.templates_version) {
+    const res = await fetch(`${API_BASE}/templates`);
+    if (!res.ok) {
+      throw new Error(`Backend returned ${res.status}`);
+    }
+    templates = await res.json();
+    await chrome.storage.local.set({ styleTemplates: templates });
+  }
+
+  return buildTextFile(templates, style, metadata.records);
+}
+
 function syncFromBackground() {
   chrome.runtime.sendMessage({ action: "get_urls" }, (response) => {
     urlListEl.value = (response?.urls || []).join("\n");
@@ -46,24 +119,11 @@ generateBtn.addEventListener("click", async () => {
 
   chrome.runtime.sendMessage({ action: "set_urls", urls });
 
-  const payload = {
-    urls,
-    style: styleEl.value,
-    use_ai: useAiEl.checked,
-  };
-
   try {
-    const res = await fetch("http://localhost:8000/api/citations/generate", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
-
-    if (!res.ok) {
-      throw new Error(`Backend returned ${res.status}`);
-    }
+    const text = useAiEl.checked
+      ? await generateOnServer(urls, styleEl.value)
+      : await generateLocally(urls, styleEl.value);
 
-    const text = await res.text();
     const dataUrl = "data:text/plain;charset=utf-8," + encodeURIComponent(text);
 
     chrome.downloads.download(
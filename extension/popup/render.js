@@ -0,0 +1,80 @@
+// Renders citations from /api/citations/metadata records using the style
+// templates served by /api/citations/templates (see shared/templates.py for
+// the template syntax). Output matches the backend's text download.
+
+const MONTHS = [
+  "January", "February", "March", "April", "May", "June",
+  "July", "August", "September", "October", "November", "December",
+];
+
+function formatDate(isoDate, format) {
+  const [year, month, day] = isoDate.split("-").map(Number);
+  const codes = {
+    "%d": String(day).padStart(2, "0"),
+    "%b": MONTHS[month - 1].slice(0, 3),
+    "%B": MONTHS[month - 1],
+    "%Y": String(year),
+  };
+  return format.replace(/%[dbBY]/g, (code) => codes[code]);
+}
+
+function knownTitle(title) {
+  if (!title || title === "No Title Found" || title.startsWith("Error")) {
+    return null;
+  }
+  return title;
+}
+
+function renderCitation(templates, style, record) {
+  const template = templates.styles[style] || templates.styles.harvard;
+  const fields = {
+    title: knownTitle(record.title) || template.unknown_title,
+    author: record.author || "",
+    domain: record.domain || "",
+    url: record.url || "",
+    sponsor: record.sponsor || "",
+  };
+  const render = (text) =>
+    text
+      .replace(/\{\?(\w+)\}(.*?)\{\/\1\}/g, (_, name, inner) => (fields[name] ? inner : ""))
+      .replace(/\{(\w+)(?::([^}]*))?\}/g, (_, name, format) =>
+        name === "date" ? formatDate(record.accessed, format) : String(fields[name])
+      );
+  return { intext: render(template.intext), reference: render(template.reference) };
+}
+
+function removeHtmlTags(text) {
+  return text
+    .replace(/<[^>]+>/g, "")
+    .replace(/&lt;/g, "<")
+    .replace(/&gt;/g, ">")
+    .replace(/&amp;/g, "&")
+    .trim();
+}
+
+function buildTextFile(templates, style, records) {
+  const lines = [
+    "Citations Output",
+    "=".repeat(60),
+    `Style: ${style.toUpperCase()}`,
+    `Total Citations: ${records.length}`,
+    "",
+    "",
+  ];
+
+  records.forEach((record, index) => {
+    const citation = renderCitation(templates, style, record);
+    lines.push(`Source ${index + 1}: ${record.url}`);
+    lines.push(`In-text citation: ${removeHtmlTags(citation.intext)}`);
+    lines.push(`Reference list entry: ${removeHtmlTags(citation.reference)}`);
+    if (record.partial) {
+      lines.push(
+        "Note: Partial result. The batch deadline passed before this page was read, " +
+          "so the citation is derived from its domain."
+      );
+    }
+    lines.push("", "-".repeat(60), "");
+  });
+
+  return lines.join("\n");
+}
@@ -0,0 +1,180 @@
+"""Linear-time byline detection for the text-pattern stage of author extraction.
+
+Bylines ("By staff reporter Jane Doe", "Written by Jane Doe", "Author: Jane
+Doe") sit next to the headline, so only a bounded window of visible text
+around the first ``<h1>`` is examined. The window is split into tokens once
+and scanned left to right without backtracking, and the whole stage runs
+under a per-page CPU budget: when it is spent the stage gives up and author
+extraction falls through to the next heuristic.
+"""
+
+import os
+import re
+import time
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover - imported lazily at runtime
+    from bs4 import BeautifulSoup
+
+# Characters of visible text examined from the headline onwards.
+BYLINE_WINDOW_CHARS = int(float(os.environ.get("CITE_BYLINE_WINDOW_KB", "16")) * 1024)
+# Characters before the headline kept in the window (kickers, bylines above the title).
+BYLINE_LEAD_CHARS = 1024
+# A bare "By First Last" only counts this close to the headline (or page start).
+SIMPLE_BYLINE_REACH = 1000
+# CPU seconds one page may spend in this stage.
+BYLINE_CPU_BUDGET = float(os.environ.get("CITE_BYLINE_BUDGET_MS", "50")) / 1000
+
+BYLINE_ROLES = frozenset({"reporter", "writer", "journalist", "editor", "correspondent", "staff"})
+
+_HIDDEN_PARENTS = frozenset({"script", "style", "noscript", "template"})
+# Runs of ASCII letters, or any other single non-space character.
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\S")
+_NAME_RE = re.compile(r"[A-Z][a-z]+")
+_NAME_END_PUNCTUATION = frozenset(".,;:")
+_BUDGET_CHECK_INTERVAL = 256
+
+Token = Tuple[str, int, int]
+
+
+class _Budget:
+    """Per-thread CPU deadline; ``thread_time`` ignores other fetch workers."""
+
+    def __init__(self, seconds: Optional[float]):
+        self.deadline = None if seconds is None else time.thread_time() + seconds
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.thread_time() >= self.deadline
+
+
+def visible_text_window(
+    soup: "BeautifulSoup",
+    max_chars: int = BYLINE_WINDOW_CHARS,
+    lead_chars: int = BYLINE_LEAD_CHARS,
+    budget: Optional[float] = None,
+) -> Optional[Tuple[str, int]]:
+    """Return ``(text, headline_offset)`` for the visible text around the first ``<h1>``.
+
+    Without a headline the window is the first ``max_chars`` of visible text
+    and the offset is 0. Text nodes are joined with newlines so words from
+    neighbouring elements never run together. Returns None if ``budget`` CPU
+    seconds run out first.
+    """
+    from bs4.element import NavigableString, PreformattedString
+
+    timer = _Budget(budget)
+    headline = soup.find("h1")
+    pieces: List[str] = []
+    length = 0
+    offset: Optional[int] = 0 if headline is None else None
+
+    for count, node in enumerate(soup.descendants):
+        if count % _BUDGET_CHECK_INTERVAL == 0 and timer.expired():
+            return None
+        if node is headline:
+            if length > lead_chars:
+                pieces = ["\n".join(pieces)[-lead_chars:]]
+                length = lead_chars + 1
+            offset = length
+        elif (
+            isinstance(node, NavigableString)
+            and not isinstance(node, PreformattedString)
+            and (node.parent is None or node.parent.name not in _HIDDEN_PARENTS)
+        ):
+            pieces.append(str(node))
+            length += len(node) + 1
+            if offset is None and length > 4 * lead_chars:
+                # Only the lead before the headline is kept; trimming in bulk stays linear.
+                pieces = ["\n".join(pieces)[-lead_chars:]]
+                length = lead_chars + 1
+            elif offset is not None and length >= offset + max_chars:
+                break
+
+    if offset is None:
+        offset = 0
+    text = "\n".join(pieces)
+    return text[: offset + max_chars], offset
+
+
+def _spaced(left: Token, right: Token) -> bool:
+    # Every non-space character is a token, so a gap between tokens is whitespace.
+    return right[1] > left[2]
+
+
+def _name_at(tokens: List[Token], index: int, bounded: bool) -> Optional[str]:
+    """Return "First Last" if two capitalised words start at ``index``.
+
+    ``bounded`` additionally requires the surname to end at whitespace, the
+    end of the text or one of ``.,;:``.
+    """
+    if index + 1 >= len(tokens):
+        return None
+    first, last = tokens[index], tokens[index + 1]
+    if not (_NAME_RE.fullmatch(first[0]) and _NAME_RE.fullmatch(last[0]) and _spaced(first, last)):
+        return None
+    if bounded and index + 2 < len(tokens):
+        following = tokens[index + 2]
+        if not _spaced(last, following) and following[0] not in _NAME_END_PUNCTUATION:
+            return None
+    return f"{first[0]} {last[0]}"
+
+
+def byline_from_text(
+    text: str, headline_offset: int = 0, budget: Optional[float] = None
+) -> Optional[str]:
+    """Find an author byline in ``text`` in a single left-to-right pass.
+
+    Matches are ranked, strongest first: "By <role words> First Last",
+    "By First Last" within :data:`SIMPLE_BYLINE_REACH` characters of the
+    headline, "Written by First Last" and "Author: First Last". Returns None
+    when nothing matches or ``budget`` CPU seconds run out.
+    """
+    timer = _Budget(budget)
+    tokens = [(match.group(), match.start(), match.end()) for match in _TOKEN_RE.finditer(text)]
+    simple = written = labelled = None
+    # True while inside a whitespace-separated run of words that contains "By".
+    after_by = False
+
+    for index, token in enumerate(tokens):
+        if index % _BUDGET_CHECK_INTERVAL == 0 and timer.expired():
+            return None
+        word, start, _ = token
+        if not word.isalpha():
+            if labelled is None and word == ":" and index > 0:
+                previous = tokens[index - 1]
+                if previous[0] in ("Author", "author") and previous[2] == start:
+                    if index + 1 < len(tokens) and _spaced(token, tokens[index + 1]):
+                        labelled = _name_at(tokens, index + 1, bounded=True)
+            after_by = False
+            continue
+
+        nxt = tokens[index + 1] if index + 1 < len(tokens) else None
+        if after_by and word in BYLINE_ROLES and nxt is not None and _spaced(token, nxt):
+            name = _name_at(tokens, index + 1, bounded=False)
+            if name:
+                return name
+        if word == "By" and nxt is not None and _spaced(token, nxt):
+            after_by = True
+            if simple is None and start < headline_offset + SIMPLE_BYLINE_REACH:
+                simple = _name_at(tokens, index + 1, bounded=True)
+        if written is None and word in ("Written", "written") and nxt is not None:
+            if nxt[0] == "by" and _spaced(token, nxt) and index + 2 < len(tokens):
+                if _spaced(nxt, tokens[index + 2]):
+                    written = _name_at(tokens, index + 2, bounded=True)
+
+    return simple or written or labelled
+
+
+def find_byline(
+    soup: "BeautifulSoup", budget: Optional[float] = BYLINE_CPU_BUDGET
+) -> Optional[str]:
+    """Return a byline author from the text around the headline, within ``budget``."""
+    start = time.thread_time()
+    window = visible_text_window(soup, budget=budget)
+    if window is None:
+        return None
+    remaining = None if budget is None else budget - (time.thread_time() - start)
+    if remaining is not None and remaining <= 0:
+        return None
+    text, headline_offset = window
+    return byline_from_text(text, headline_offset, budget=remaining)
@@ -1,210 +1,283 @@
 """Citation generator supporting multiple academic citation styles."""
 
-import json
 import os
 import re
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, Literal, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Literal, Optional, Tuple
 from urllib.parse import urlparse
 
-import requests
-from bs4 import BeautifulSoup
+from shared.authors import author_from_domain, determine_author, sponsor_class
+from shared.discovery import stream_source_citations
+from shared.fetching import (
+    FETCH_BODY_TIMEOUT,
+    FETCH_TIMEOUT,
+    FetchCancelled,
+    FetchSkipped,
+    HostScheduler,
+    NegativeCache,
+    get_host_scheduler,
+    get_negative_cache,
+    host_of,
+    shutdown_response,
+)
+from shared.memory import (
+    DEFAULT_PAGE_BYTES,
+    MAX_PAGE_BYTES,
+    MemoryBudget,
+    Reservation,
+    get_memory_budget,
+    page_reservation,
+)
+from shared.parsing import (
+    NO_TITLE,
+    PageMetadata,
+    ParsePool,
+    get_parse_pool,
+    make_soup,
+    page_title,
+)
+from shared.templates import known_title
+
+if TYPE_CHECKING:  # pragma: no cover - imported lazily at runtime
+    from bs4 import BeautifulSoup
 
 CitationStyle = Literal["harvard", "mla", "chicago", "apa", "ieee", "vancouver", "unsw"]
 
+# Serialises updates to CitationGenerator.citations and appends to citations_output.txt
+# when citations are generated concurrently.
+_OUTPUT_LOCK = threading.Lock()
+
+
+def _requests() -> Any:
+    """Import ``requests`` on first use so deterministic cold starts stay cheap."""
+    import requests
+
+    globals()["requests"] = requests
+    return requests
+
+
+def _beautiful_soup() -> Any:
+    """Import BeautifulSoup on first use so deterministic cold starts stay cheap."""
+    from bs4 import BeautifulSoup
+
+    globals()["BeautifulSoup"] = BeautifulSoup
+    return BeautifulSoup
+
+
+def load_page_stack() -> None:
+    """Import the HTTP and HTML parser stacks eagerly.
+
+    Needed before introspecting ``CitationGenerator`` type hints (e.g. when the
+    ConnectOnion agent registers it as a tool), since ``BeautifulSoup`` is only
+    bound in this module once the parser stack has been loaded.
+    """
+    _requests()
+    _beautiful_soup()
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve ``requests`` and ``BeautifulSoup`` lazily as module attributes."""
+    if name == "requests":
+        return _requests()
+    if name == "BeautifulSoup":
+        return _beautiful_soup()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class CitationGenerator:
     """Academic citation generator supporting multiple citation styles."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        parse_pool: Optional[ParsePool] = None,
+        scheduler: Optional[HostScheduler] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        memory_budget: Optional[MemoryBudget] = None,
+        cancel: Optional[threading.Event] = None,
+    ):
         self.citations: Dict[str, Dict[str, Dict[str, str]]] = {}
+        # URLs whose last citation fell back to the domain because the fetch failed.
+        self.fetch_errors: Dict[str, str] = {}
         self.default_style: CitationStyle = "unsw"
+        self.parse_pool = parse_pool or get_parse_pool()
+        self.scheduler = scheduler or get_host_scheduler()
+        self.negative_cache = negative_cache or get_negative_cache()
+        self.memory_budget = memory_budget or get_memory_budget()
+        # Once set, fetches raise FetchCancelled instead of starting or continuing.
+        self.cancel = cancel
 
     def get_page_title(self, url: str) -> str:
         """Return the page title or an error string."""
         title, _ = self.get_page_content(url)
         return title
 
-    def get_page_content(self, url: str) -> Tuple[str, Optional[BeautifulSoup]]:
+    def get_page_content(self, url: str) -> Tuple[str, Optional["BeautifulSoup"]]:
         """Return (title, soup) for the given URL."""
+        with self._reserved_fetch(url) as (content, error):
+            if content is None:
+                return error, None
+
+            soup = make_soup(content, self.parse_pool.backend)
+            return page_title(soup), soup
+
+    @contextmanager
+    def _reserved_fetch(self, url: str) -> Iterator[Tuple[Optional[bytes], str]]:
+        """Fetch ``url`` like :meth:`_fetch_page`, under a memory-budget reservation.
+
+        The reservation is taken only when a request will actually be sent, and
+        covers the body and parse tree until the ``with`` block exits.
+        """
+        skip_error = self._skip_error(url)
+        if skip_error is not None:
+            yield None, skip_error
+            return
+        nbytes = page_reservation(DEFAULT_PAGE_BYTES)
+        with Reservation(self.memory_budget, nbytes, self.cancel) as reservation:
+            yield self._fetch_page(url, reservation)
+
+    def _skip_error(self, url: str) -> Optional[str]:
+        """Return the error title if ``url`` is known to fail without a request, else None."""
+        cached_error = self.negative_cache.get(url)
+        if cached_error is not None:
+            return cached_error
+        host = host_of(url)
+        if self.scheduler.breaker.is_open(host):
+            return f"Error fetching page: {host} is unavailable (circuit open)"
+        return None
+
+    def _fetch_page(
+        self, url: str, reservation: Optional[Reservation] = None
+    ) -> Tuple[Optional[bytes], str]:
+        """Return (body, "") on success or (None, error title) on failure.
+
+        :class:`FetchCancelled` propagates, so a cancelled batch never turns
+        an unfinished page into an error citation.
+        """
+        skip_error = self._skip_error(url)
+        if skip_error is not None:
+            return None, skip_error
+
+        requests = _requests()
         try:
-            response = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-            response.raise_for_status()
+            with self._open_stream(url) as response:
+                body = self._read_body(response, reservation)
+            return body, ""
+        except FetchSkipped as exc:
+            return None, f"Error fetching page: {exc}"
         except requests.RequestException as exc:
-            return f"Error fetching page: {exc}", None
+            error = f"Error fetching page: {exc}"
+            self.negative_cache.put(url, error)
+            return None, error
 
-        soup = BeautifulSoup(response.content, "html.parser")
-        title = soup.title.string.strip() if soup.title and soup.title.string else "No Title Found"
-        return title, soup
+    @contextmanager
+    def _open_stream(self, url: str) -> Iterator[Any]:
+        """Yield a streamed response for ``url`` whose status has been checked.
 
-    def _determine_author(self, soup: Optional[BeautifulSoup], domain: str) -> str:
-        """Extract author/organisation name from page content, fallback to domain if not found."""
-        if soup is None:
-            return self._author_from_domain(domain)
-
-        author = None
-
-        # 1. Try meta name="author"
-        meta_author = soup.find("meta", attrs={"name": "author"})
-        if meta_author and meta_author.get("content"):
-            author = meta_author.get("content").strip()
-
-        # 2. Try meta property="article:author"
-        if not author:
-            meta_article_author = soup.find("meta", attrs={"property": "article:author"})
-            if meta_article_author and meta_article_author.get("content"):
-                content = meta_article_author.get("content").strip()
-                if not content.startswith("http") and "/" not in content:
-                    author = content
-
-        # 3. Try meta property="og:site_name" (often the organization)
-        if not author:
-            meta_site_name = soup.find("meta", attrs={"property": "og:site_name"})
-            if meta_site_name and meta_site_name.get("content"):
-                author = meta_site_name.get("content").strip()
-
-        # 4. Try link rel="author"
-        if not author:
-            link_author = soup.find("link", attrs={"rel": "author"})
-            if link_author and link_author.get("title"):
-                author = link_author.get("title").strip()
-
-        # 5. Try schema.org organization/author
-        if not author:
-            json_scripts = soup.find_all("script", type="application/ld+json")
-            for script in json_scripts:
-                try:
-                    data = json.loads(script.string)
-                    if isinstance(data, dict):
-                        if "author" in data:
-                            author_data = data["author"]
-                            if isinstance(author_data, list) and len(author_data) > 0:
-                                first_author = author_data[0]
-                                if isinstance(first_author, dict) and "name" in first_author:
-                                    author = first_author["name"].strip()
-                                    break
-                            elif isinstance(author_data, dict) and "name" in author_data:
-                                author = author_data["name"].strip()
-                                break
-                        if not author and "publisher" in data:
-                            publisher = data["publisher"]
-                            if isinstance(publisher, dict) and "name" in publisher:
-                                author = publisher["name"].strip()
-                                break
-                except (json.JSONDecodeError, TypeError):
-                    continue
-
-        # 6. Try to find author in text patterns
-        if not author:
-            role_pattern = r"By\s+(?:[A-Za-z\s]+?\s+)?(?:reporter|writer|journalist|editor|correspondent|staff)\s+([A-Z][a-z]+\s+[A-Z][a-z]+)"
-
-            for tag in ["p", "div", "span", "h1", "h2", "h3", "h4", "article"]:
-                for elem in soup.find_all(tag, limit=50):
-                    text = elem.get_text()
-                    if "By" in text and ("reporter" in text or "writer" in text or "journalist" in text):
-                        match = re.search(role_pattern, text)
-                        if match:
-                            potential_author = match.group(1).strip()
-                            words = potential_author.split()
-                            if (
-                                len(words) == 2
-                                and all(word and word[0].isupper() and word.isalpha() for word in words)
-                                and "/" not in potential_author
-                                and "http" not in potential_author.lower()
-                                and "." not in potential_author
-                            ):
-                                author = potential_author
-                                break
-                if author:
+        How the body read ends (including errors raised in the ``with`` block)
+        is reported to the scheduler, so the host's circuit breaker sees it.
+        """
+        response = self.scheduler.fetch(
+            url,
+            cancel=self.cancel,
+            timeout=FETCH_TIMEOUT,
+            headers={"User-Agent": "Mozilla/5.0"},
+            stream=True,
+        )
+        try:
+            response.raise_for_status()
+            yield response
+        except BaseException as exc:
+            self.scheduler.record_body(url, exc)
+            raise
+        finally:
+            response.close()
+        self.scheduler.record_body(url)
+
+    def _read_body(self, response: Any, reservation: Optional[Reservation]) -> bytes:
+        """Stream the body (up to MAX_PAGE_BYTES), growing the memory reservation to fit."""
+        length = response.headers.get("Content-Length")
+        if reservation is not None and length and length.isdigit():
+            reservation.resize(page_reservation(int(length)))
+
+        body = self._iter_body(response)
+        chunks = []
+        size = 0
+        try:
+            for chunk in body:
+                chunk = chunk[: MAX_PAGE_BYTES - size]
+                chunks.append(chunk)
+                size += len(chunk)
+                if reservation is not None and page_reservation(size) > reservation.nbytes:
+                    reservation.resize(page_reservation(size))
+                if size >= MAX_PAGE_BYTES:
                     break
+        finally:
+            body.close()
+        return b"".join(chunks)
+
+    def _iter_body(self, response: Any) -> Iterator[bytes]:
+        """Yield the chunks of a streamed response body as they arrive.
+
+        The per-read timeout does not bound a body that keeps trickling in, so
+        the download is cut off with :class:`requests.Timeout` once it has taken
+        ``FETCH_BODY_TIMEOUT`` seconds, and with :class:`FetchCancelled` once the
+        generator is cancelled. Close the iterator if it is not read to the end.
+        """
+        requests = _requests()
+        timed_out = requests.Timeout(f"body not received within {FETCH_BODY_TIMEOUT:g}s")
+        deadline = time.monotonic() + FETCH_BODY_TIMEOUT
+        expired = threading.Event()
+
+        def expire() -> None:
+            expired.set()
+            shutdown_response(response)
 
-            if not author:
-                text_content = soup.get_text()
-                match = re.search(role_pattern, text_content)
-                if match:
-                    potential_author = match.group(1).strip()
-                    words = potential_author.split()
-                    if (
-                        len(words) == 2
-                        and all(word and word[0].isupper() and word.isalpha() for word in words)
-                        and "/" not in potential_author
-                        and "http" not in potential_author.lower()
-                        and "." not in potential_author
-                    ):
-                        author = potential_author
-
-                if not author:
-                    simple_pattern = r"By\s+([A-Z][a-z]+\s+[A-Z][a-z]+)(?:\s|$|[.,;:]|\.)"
-                    matches = list(re.finditer(simple_pattern, text_content))
-                    for match in matches:
-                        potential_author = match.group(1).strip()
-                        words = potential_author.split()
-                        if (
-                            len(words) == 2
-                            and all(word and word[0].isupper() and word.isalpha() for word in words)
-                            and "/" not in potential_author
-                            and "http" not in potential_author.lower()
-                            and "." not in potential_author
-                        ):
-                            start_pos = match.start()
-                            if start_pos < 1000:
-                                author = potential_author
-                                break
-
-                if not author:
-                    patterns = [
-                        r"[Ww]ritten\s+by\s+([A-Z][a-z]+\s+[A-Z][a-z]+)(?:\s|$|[.,;:])",
-                        r"[Aa]uthor:\s+([A-Z][a-z]+\s+[A-Z][a-z]+)(?:\s|$|[.,;:])",
-                    ]
-                    for pattern in patterns:
-                        match = re.search(pattern, text_content)
-                        if match:
-                            potential_author = match.group(1).strip()
-                            words = potential_author.split()
-                            if (
-                                len(words) == 2
-                                and all(word and word[0].isupper() and word.isalpha() for word in words)
-                                and "/" not in potential_author
-                            ):
-                                author = potential_author
-                                break
-
-        # 7. Try to find author in common HTML elements
-        if not author:
-            author_selectors = [
-                soup.find("span", class_=lambda x: x and ("author" in x.lower() or "byline" in x.lower())),
-                soup.find("div", class_=lambda x: x and ("author" in x.lower() or "byline" in x.lower())),
-                soup.find("p", class_=lambda x: x and ("author" in x.lower() or "byline" in x.lower())),
-                soup.find("span", id=lambda x: x and "author" in x.lower()),
-                soup.find("div", id=lambda x: x and "author" in x.lower()),
-                soup.find("p", id=lambda x: x and "author" in x.lower()),
-            ]
-            for element in author_selectors:
-                if element:
-                    text = element.get_text(strip=True)
-                    if "By" in text or "by" in text:
-                        match = re.search(r"[Bb]y\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)", text)
-                        if match:
-                            author = match.group(1).strip()
-                            break
-                    elif len(text) < 100 and len(text.split()) <= 4:
-                        author = text
-                        break
-
-        # 8. Try to find organization name
-        if not author:
-            org_selectors = [
-                soup.find("span", class_=lambda x: x and "org" in x.lower()),
-                soup.find("div", class_=lambda x: x and "org" in x.lower()),
-            ]
-            for element in org_selectors:
-                if element and element.get_text(strip=True):
-                    text = element.get_text(strip=True)
-                    if len(text) < 100:
-                        author = text
-                        break
-
-        return author.strip() if author else self._author_from_domain(domain)
+        def cancelled() -> bool:
+            return self.cancel is not None and self.cancel.is_set()
+
+        watchdog = threading.Timer(FETCH_BODY_TIMEOUT, expire)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if cancelled():
+                    raise FetchCancelled("download cancelled")
+                if expired.is_set() or time.monotonic() > deadline:
+                    raise timed_out
+                yield chunk
+            # A close-delimited body just ends when the socket is shut down by
+            # the watchdog or HostScheduler.cancel.
+            if cancelled():
+                raise FetchCancelled("download cancelled")
+            if expired.is_set():
+                raise timed_out
+        except requests.RequestException:
+            if cancelled():
+                raise FetchCancelled("download cancelled") from None
+            if expired.is_set():
+                raise timed_out from None
+            raise
+        finally:
+            watchdog.cancel()
+
+    def _get_page_metadata(self, url: str, domain: str, want_author: bool) -> PageMetadata:
+        """Fetch a page and extract its metadata via the parse pool.
+
+        The body and parse tree are covered by a memory-budget reservation from
+        before the request is sent until the metadata has been extracted.
+        """
+        with self._reserved_fetch(url) as (content, error):
+            if content is None:
+                author = self._author_from_domain(domain) if want_author else None
+                return PageMetadata(title=error, author=author, error=error)
+            return self.parse_pool.parse(content, domain, want_author)
+
+    def _determine_author(self, soup: Optional["BeautifulSoup"], domain: str) -> str:
+        """Extract author/organisation name from page content, fallback to domain if not found."""
+        return determine_author(soup, domain)
 
     def _get_access_date(self, url: str) -> datetime:
         """Return the current datetime as the access timestamp."""
@@ -292,27 +365,11 @@ class CitationGenerator:
 
     def _author_from_domain(self, domain: str) -> str:
         """Extract author/organisation name from domain name."""
-        domain_clean = domain.replace("www.", "")
-        main_domain = domain_clean.split(".")[0]
-        author = " ".join(word.capitalize() for word in main_domain.replace("-", " ").replace("_", " ").split())
-
-        if ".gov.au" in domain or ".gov." in domain:
-            parts = domain_clean.split(".")
-            if len(parts) > 2:
-                org_part = parts[0].upper()
-                if org_part == "DSS":
-                    return "Department of Social Services"
-                elif org_part == "ATO":
-                    return "Australian Taxation Office"
-                elif org_part == "ABS":
-                    return "Australian Bureau of Statistics"
-            return author + " (Government)"
-        elif ".edu.au" in domain or ".edu." in domain:
-            return author + " (University)"
-        elif ".org" in domain:
-            return author + " (Organisation)"
-
-        return author
+        return author_from_domain(domain)
+
+    def _sponsor_class(self, domain: str) -> Optional[str]:
+        """Return the sponsoring body type UNSW references name for ``domain``, if any."""
+        return sponsor_class(domain)
 
     def _format_unsw(self, title: str, domain: str, url: str, access_date: datetime, author: str) -> Dict[str, str]:
         """Format citation in UNSW Harvard style (University of New South Wales)."""
@@ -321,13 +378,7 @@ class CitationGenerator:
 
         site_name = title if title != "No Title Found" and not title.startswith("Error") else "Unknown website"
 
-        sponsor = None
-        if ".gov." in domain or ".gov.au" in domain:
-            sponsor = "Government"
-        elif ".edu." in domain or ".edu.au" in domain:
-            sponsor = "Educational institution"
-        elif ".org" in domain:
-            sponsor = "Organisation"
+        sponsor = self._sponsor_class(domain)
 
         if title != "No Title Found" and not title.startswith("Error"):
             intext = f"({author} {year})"
@@ -342,6 +393,79 @@ class CitationGenerator:
 
         return {"intext": intext, "reference": reference}
 
+    def _format_citation(
+        self, style: str, metadata: PageMetadata, domain: str, url: str, access_date: datetime
+    ) -> Tuple[str, Dict[str, str]]:
+        """Format ``metadata`` in ``style``; return the style actually used and the citation."""
+        title = metadata.title
+        if style == "unsw":
+            author = metadata.author or self._author_from_domain(domain)
+            return style, self._format_unsw(title, domain, url, access_date, author)
+        if style == "mla":
+            return style, self._format_mla(title, domain, url, access_date)
+        if style == "chicago":
+            return style, self._format_chicago(title, domain, url, access_date)
+        if style == "apa":
+            return style, self._format_apa(title, domain, url, access_date)
+        if style == "ieee":
+            return style, self._format_ieee(title, domain, url, access_date)
+        if style == "vancouver":
+            return style, self._format_vancouver(title, domain, url, access_date)
+        return "harvard", self._format_harvard(title, domain, url, access_date)
+
+    def _cite(
+        self, url: str, styles: Iterable[str], record: bool = True
+    ) -> Tuple[PageMetadata, Dict[str, Dict[str, str]]]:
+        """Fetch ``url`` once and format it in every requested style.
+
+        Unknown styles fall back to Harvard. With ``record`` the citations are
+        stored on this instance and appended to ``citations_output.txt``.
+        """
+        styles = [style.lower() for style in styles]
+        domain = urlparse(url).netloc
+        access_date = self._get_access_date(url)
+        # Only UNSW prints an author; the other styles skip the author heuristics.
+        metadata = self._get_page_metadata(url, domain, want_author="unsw" in styles)
+
+        citations: Dict[str, Dict[str, str]] = {}
+        for style in styles:
+            resolved, formatted = self._format_citation(style, metadata, domain, url, access_date)
+            citations[resolved] = formatted
+
+        if record:
+            with _OUTPUT_LOCK:
+                self.citations.setdefault(url, {}).update(citations)
+                if metadata.error:
+                    self.fetch_errors[url] = metadata.error
+                else:
+                    self.fetch_errors.pop(url, None)
+            for style in citations:
+                self._update_citation_output(style)
+        return metadata, citations
+
+    def _metadata_record(self, url: str, partial: bool = False) -> Dict[str, Any]:
+        """Return the structured metadata every style is rendered from.
+
+        Keys match what :func:`shared.templates.render_citation` expects. A
+        ``partial`` record is derived from the domain alone, without fetching.
+        """
+        domain = urlparse(url).netloc
+        access_date = self._get_access_date(url)
+        if partial:
+            metadata = PageMetadata(title=NO_TITLE, author=self._author_from_domain(domain))
+        else:
+            metadata = self._get_page_metadata(url, domain, want_author=True)
+        return {
+            "url": url,
+            "title": known_title(metadata.title),
+            "author": metadata.author or self._author_from_domain(domain),
+            "domain": domain,
+            "sponsor": self._sponsor_class(domain),
+            "accessed": access_date.date().isoformat(),
+            "error": metadata.error,
+            "partial": partial,
+        }
+
     def generate_citation(self, url: str, style: CitationStyle = "harvard") -> str:
         """
         Generate a citation for a URL in the specified academic style.
@@ -357,43 +481,47 @@ class CitationGenerator:
         Returns:
             Formatted string with in-text citation and reference list entry
         """
-        domain = urlparse(url).netloc
-        access_date = self._get_access_date(url)
-        style_lower = style.lower()
+        _, citations = self._cite(url, [style])
+        style_lower, formatted = next(iter(citations.items()))
 
-        if style_lower == "unsw":
-            title, soup = self.get_page_content(url)
-            if title.startswith("Error"):
-                title = self.get_page_title(url)
-                soup = None
-            author = self._determine_author(soup, domain)
-            formatted = self._format_unsw(title, domain, url, access_date, author)
-        else:
-            title = self.get_page_title(url)
-
-            if style_lower == "harvard":
-                formatted = self._format_harvard(title, domain, url, access_date)
-            elif style_lower == "mla":
-                formatted = self._format_mla(title, domain, url, access_date)
-            elif style_lower == "chicago":
-                formatted = self._format_chicago(title, domain, url, access_date)
-            elif style_lower == "apa":
-                formatted = self._format_apa(title, domain, url, access_date)
-            elif style_lower == "ieee":
-                formatted = self._format_ieee(title, domain, url, access_date)
-            elif style_lower == "vancouver":
-                formatted = self._format_vancouver(title, domain, url, access_date)
-            else:
-                formatted = self._format_harvard(title, domain, url, access_date)
-                style_lower = "harvard"
+        return f"Generated {style_lower.upper()} citation for {url}:\n\nIn-text citation: {formatted['intext']}\n\nReference list entry:\n{formatted['reference']}"
 
-        if url not in self.citations:
-            self.citations[url] = {}
-        self.citations[url][style_lower] = formatted
+    def generate_citations_from_source(
+        self, source_url: str, style: CitationStyle = "unsw", max_links: int = 200
+    ) -> str:
+        """
+        Generate citations for every link listed in a sitemap, RSS/Atom feed or reading-list page.
 
-        self._update_citation_output(style_lower)
+        The source is parsed incrementally and each discovered link is cited as
+        soon as it is found, in the chosen style.
 
-        return f"Generated {style_lower.upper()} citation for {url}:\n\nIn-text citation: {formatted['intext']}\n\nReference list entry:\n{formatted['reference']}"
+        Args:
+            source_url: URL of the sitemap, feed or page full of links
+            style: Citation style to use (default: unsw)
+            max_links: Maximum number of links to cite (default: 200)
+
+        Returns:
+            Summary of the citations generated, with any per-link errors
+        """
+        entries = []
+        summary: Dict[str, Any] = {}
+        for event in stream_source_citations(self, source_url, style, max_links):
+            if event["event"] == "citation":
+                entries.append(
+                    f"URL: {event['url']}\n"
+                    f"In-text citation: {event['intext']}\n"
+                    f"Reference: {event['reference']}"
+                )
+            elif event["event"] == "error":
+                entries.append(f"URL: {event['url']}\nError: {event['message']}")
+            else:
+                summary = event
+
+        header = (
+            f"Processed {summary.get('completed', 0)} of {summary.get('discovered', 0)} link(s) "
+            f"found at {source_url} ({style.upper()} style):"
+        )
+        return "\n\n".join([header] + entries)
 
     def get_all_citations(self, style: CitationStyle = "harvard") -> str:
         """
@@ -450,6 +578,7 @@ class CitationGenerator:
         """
         count = len(self.citations)
         self.citations.clear()
+        self.fetch_errors.clear()
         return f"Cleared {count} citation(s)."
 
     def _strip_html_tags(self, text: str) -> str:
@@ -460,7 +589,8 @@ class CitationGenerator:
 
     def _update_citation_output(self, style: str) -> None:
         """Automatically append new citations to citations_output.txt after each generation."""
-        self._append_citations_to_output(style)
+        with _OUTPUT_LOCK:
+            self._append_citations_to_output(style)
 
     def _load_existing_citations(self, filename: str = "citations_output.txt") -> Dict[str, set]:
         """Read existing citations from file to avoid duplicates. Returns dict of {url: {styles}}."""
@@ -491,7 +621,7 @@ class CitationGenerator:
         existing_citations = self._load_existing_citations(filename)
 
         new_citations = []
-        for url, styles_dict in self.citations.items():
+        for url, styles_dict in list(self.citations.items()):
             if style_lower in styles_dict:
                 citation = styles_dict[style_lower]
                 if url in existing_citations:
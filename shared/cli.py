@@ -0,0 +1,222 @@
+"""Command-line bulk citation tool.
+
+Reads URLs from a file or stdin, cites them in parallel through the host-aware
+scheduler and streams each result as soon as it completes. With
+``--checkpoint`` every finished URL is appended to a JSONL file; re-running
+the same command replays finished results from it without fetching them again
+and only works on the rest (including URLs whose fetch failed last time, and
+URLs recorded without one of the requested styles).
+Usage::
+
+    cite-everything urls.txt --style unsw --style apa --checkpoint run.jsonl > citations.txt
+    cat urls.txt | cite-everything - --format jsonl --workers 16
+"""
+
+import argparse
+import json
+import sys
+import threading
+from typing import IO, Any, Dict, Iterable, List, Optional, get_args
+
+from shared.citation_generator import CitationGenerator, CitationStyle
+from shared.fetching import FETCH_WORKERS
+from shared.parsing import PageMetadata
+
+STYLES = get_args(CitationStyle)
+
+
+def read_urls(stream: Iterable[str]) -> List[str]:
+    """Return unique URLs in input order, skipping blank lines and ``#`` comments."""
+    urls: Dict[str, None] = {}
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.setdefault(line, None)
+    return list(urls)
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    """Return the last recorded result per URL; a torn final line is ignored."""
+    records: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(record, dict) and "url" in record:
+                    records[record["url"]] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+
+def _open_checkpoint(path: str) -> IO[str]:
+    """Open ``path`` for appending, terminating a torn final line first."""
+    file = open(path, "a+", encoding="utf-8")
+    if file.tell() > 0:
+        file.seek(file.tell() - 1)
+        if file.read(1) != "\n":
+            file.write("\n")
+    return file
+
+
+def _result_record(
+    generator: CitationGenerator,
+    url: str,
+    metadata: PageMetadata,
+    citations: Dict[str, Dict[str, str]],
+) -> Dict[str, Any]:
+    clean = {
+        style: {key: generator._strip_html_tags(value) for key, value in citation.items()}
+        for style, citation in citations.items()
+    }
+    record = {"url": url, "status": "ok", "title": metadata.title, "citations": clean}
+    if metadata.error:
+        # Fetch failures still get a fallback citation, but are retried on resume.
+        record.update(status="failed", error=metadata.error)
+    return record
+
+
+def _replay_record(record: Optional[Dict[str, Any]], styles: List[str]) -> Optional[Dict[str, Any]]:
+    """Return a finished checkpoint ``record`` narrowed to ``styles``, or None to refetch."""
+    if not record or record.get("status") != "ok":
+        return None
+    citations = record.get("citations", {})
+    if any(style not in citations for style in styles):
+        return None
+    return {**record, "citations": {style: citations[style] for style in styles}}
+
+
+def _error_record(url: str, error: BaseException) -> Dict[str, Any]:
+    return {"url": url, "status": "failed", "error": str(error), "citations": {}}
+
+
+def write_record(out: IO[str], record: Dict[str, Any], output_format: str) -> None:
+    """Write one result to ``out`` as a JSON line or a plain-text block."""
+    if output_format == "jsonl":
+        out.write(json.dumps(record) + "\n")
+    else:
+        lines = [f"Source: {record['url']}"]
+        if record.get("error"):
+            lines.append(f"Error: {record['error']}")
+        for style, citation in record["citations"].items():
+            lines.append(f"[{style.upper()}] In-text citation: {citation['intext']}")
+            lines.append(f"[{style.upper()}] Reference list entry: {citation['reference']}")
+        lines.extend(["", "-" * 60, ""])
+        out.write("\n".join(lines) + "\n")
+    out.flush()
+
+
+def run(
+    urls: List[str],
+    styles: List[str],
+    out: IO[str],
+    output_format: str = "text",
+    workers: Optional[int] = None,
+    checkpoint: Optional[str] = None,
+    generator: Optional[CitationGenerator] = None,
+) -> int:
+    """Cite ``urls`` in every style in ``styles``; return the number of failed URLs.
+
+    On ``KeyboardInterrupt`` the generator's ``cancel`` event is set, so fetches
+    still in flight give up instead of delaying the exit.
+    """
+    generator = generator or CitationGenerator(cancel=threading.Event())
+    done = load_checkpoint(checkpoint) if checkpoint else {}
+    todo = []
+    for url in urls:
+        replay = _replay_record(done.get(url), styles)
+        if replay is not None:
+            write_record(out, replay, output_format)
+        else:
+            todo.append(url)
+
+    failures = 0
+    checkpoint_file = _open_checkpoint(checkpoint) if checkpoint else None
+    batch = generator.scheduler.run(
+        todo, lambda url: generator._cite(url, styles, record=False), workers, generator.cancel
+    )
+    try:
+        for url, future in batch:
+            error = future.exception()
+            if error is not None:
+                record = _error_record(url, error)
+            else:
+                record = _result_record(generator, url, *future.result())
+            failures += record["status"] != "ok"
+            write_record(out, record, output_format)
+            if checkpoint_file is not None:
+                checkpoint_file.write(json.dumps(record) + "\n")
+                checkpoint_file.flush()
+    except KeyboardInterrupt:
+        if generator.cancel is not None:
+            generator.scheduler.cancel(generator.cancel)
+        raise
+    finally:
+        batch.close()
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run ``cite-everything`` with ``argv``; return 0 if every URL was cited, 1 otherwise."""
+    parser = argparse.ArgumentParser(
+        prog="cite-everything", description="Generate citations for a list of URLs."
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-", help="file with one URL per line ('-' or omitted: stdin)"
+    )
+    parser.add_argument(
+        "-s",
+        "--style",
+        dest="styles",
+        action="append",
+        choices=STYLES,
+        help="citation style; repeat for several styles from one fetch (default: unsw)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=FETCH_WORKERS,
+        help=f"concurrent fetches (default: {FETCH_WORKERS})",
+    )
+    parser.add_argument(
+        "-c", "--checkpoint", help="JSONL file recording finished URLs; re-run to resume"
+    )
+    parser.add_argument("-f", "--format", choices=("text", "jsonl"), default="text")
+    parser.add_argument("-o", "--output", help="write results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.input == "-":
+        urls = read_urls(sys.stdin)
+    else:
+        with open(args.input, "r", encoding="utf-8") as file:
+            urls = read_urls(file)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        failures = run(
+            urls,
+            list(dict.fromkeys(args.styles or ["unsw"])),
+            out,
+            output_format=args.format,
+            workers=args.workers,
+            checkpoint=args.checkpoint,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; re-run with the same --checkpoint to resume.", file=sys.stderr)
+        return 130
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Cited {len(urls) - failures} of {len(urls)} URL(s).", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""Link discovery from sitemaps, RSS/Atom feeds and reading-list pages.
+
+Sources are parsed incrementally as their bytes stream in, so links reach the
+citation pipeline while the rest of the document is still downloading, and a
+huge sitemap never has to be held in memory: XML is read with lxml's pull
+parser (iterparse-style, clearing each processed entry), HTML listings with
+the standard library's incremental ``HTMLParser``. Gzip-compressed sitemaps
+(``sitemap.xml.gz``) are decompressed on the fly.
+"""
+
+import threading
+import zlib
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+
+if TYPE_CHECKING:  # pragma: no cover - avoids a circular import at runtime
+    from shared.citation_generator import CitationGenerator, CitationStyle
+
+# Nested sitemap indexes are followed at most this deep.
+MAX_SITEMAP_DEPTH = 2
+
+_XML_MARKERS = (b"<?xml", b"<urlset", b"<sitemapindex", b"<rss", b"<feed", b"<rdf:rdf")
+_GZIP_MAGIC = b"\x1f\x8b"
+# Namespaces of <url>/<sitemap> entries (None: sitemaps that omit the xmlns).
+_SITEMAP_NAMESPACES = frozenset(
+    {
+        None,
+        "http://www.sitemaps.org/schemas/sitemap/0.9",
+        "http://www.google.com/schemas/sitemap/0.84",
+        "http://www.google.com/schemas/sitemap/0.9",
+    }
+)
+
+
+def _is_xml(first_chunk: bytes, content_type: str) -> bool:
+    """Decide between the XML and HTML parsers from headers, then content."""
+    content_type = content_type.lower()
+    if "html" in content_type:
+        return False
+    if "xml" in content_type or "rss" in content_type or "atom" in content_type:
+        return True
+    head = first_chunk.lstrip()[:512].lower()
+    return any(marker in head for marker in _XML_MARKERS) and b"<html" not in head
+
+
+def _gunzip(chunks: Iterable[bytes], piece_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Decompress a gzip stream incrementally, in pieces of at most ``piece_size`` bytes."""
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk, piece_size)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, piece_size)
+    yield decompressor.flush()
+
+
+class _XmlLinkParser:
+    """Pull links out of sitemaps, sitemap indexes, RSS and Atom feeds."""
+
+    def __init__(self, base_url: str):
+        from lxml import etree
+
+        self._etree = etree
+        self.base_url = base_url
+        self._parser = etree.XMLPullParser(
+            events=("end",), recover=True, resolve_entities=False, no_network=True
+        )
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[str, str]]:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> Iterator[Tuple[str, str]]:
+        try:
+            self._parser.close()
+        except self._etree.XMLSyntaxError:
+            pass
+        return self._drain()
+
+    def _drain(self) -> Iterator[Tuple[str, str]]:
+        for _, element in self._parser.read_events():
+            if not isinstance(element.tag, str):
+                continue
+            qname = self._etree.QName(element)
+            name = qname.localname
+            parent = element.getparent()
+            parent_qname = self._etree.QName(parent) if parent is not None else None
+            parent_name = parent_qname.localname if parent_qname is not None else ""
+
+            if name == "loc" and element.text:
+                # Only <url>/<sitemap> entries; not e.g. <image:loc> in image sitemaps.
+                if (
+                    parent_name in ("url", "sitemap")
+                    and qname.namespace == parent_qname.namespace
+                    and qname.namespace in _SITEMAP_NAMESPACES
+                ):
+                    kind = "sitemap" if parent_name == "sitemap" else "page"
+                    yield kind, urljoin(self.base_url, element.text.strip())
+            elif name == "link" and parent_name == "item" and element.text:  # RSS
+                yield "page", urljoin(self.base_url, element.text.strip())
+            elif name == "link" and parent_name == "entry" and element.get("href"):  # Atom
+                if element.get("rel", "alternate") == "alternate":
+                    yield "page", urljoin(self.base_url, element.get("href").strip())
+            elif name in ("url", "sitemap", "item", "entry"):
+                # Processed entries are no longer needed; keep the tree flat.
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+
+class _HtmlLinkParser(HTMLParser):
+    """Collect ``<a href>`` targets from a reading-list or listing page."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self._found: List[Tuple[str, str]] = []
+        self._decoder: Optional[Any] = None
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "base":
+            href = dict(attrs).get("href")
+            if href:
+                self.base_url = urljoin(self.base_url, href)
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self._found.append(("page", urljoin(self.base_url, href.strip())))
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[str, str]]:  # type: ignore[override]
+        if self._decoder is None:
+            import codecs
+
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        super().feed(self._decoder.decode(chunk))
+        return self._drain()
+
+    def close(self) -> Iterator[Tuple[str, str]]:  # type: ignore[override]
+        if self._decoder is not None:
+            super().feed(self._decoder.decode(b"", final=True))
+        super().close()
+        return self._drain()
+
+    def _drain(self) -> Iterator[Tuple[str, str]]:
+        found, self._found = self._found, []
+        return iter(found)
+
+
+def iter_links(
+    chunks: Iterable[bytes], base_url: str, content_type: str = ""
+) -> Iterator[Tuple[str, str]]:
+    """Yield ``(kind, url)`` pairs from a streamed document as they are parsed.
+
+    ``kind`` is ``"sitemap"`` for entries of a sitemap index and ``"page"``
+    for everything else. Gzip-compressed documents are decompressed first. The
+    parser is chosen from ``content_type`` or, when that is inconclusive, by
+    sniffing the first chunk. A corrupt gzip stream raises :class:`zlib.error`.
+    """
+    chunks = iter(chunks)
+    first = next((chunk for chunk in chunks if chunk.strip()), b"")
+    if first.startswith(_GZIP_MAGIC):
+        chunks = _gunzip(chain([first], chunks))
+        first = next((chunk for chunk in chunks if chunk.strip()), b"")
+        if "gzip" in content_type.lower():
+            content_type = ""  # describes the archive, not the document inside
+    if not first:
+        return
+
+    if _is_xml(first, content_type):
+        parser: Any = _XmlLinkParser(base_url)
+    else:
+        parser = _HtmlLinkParser(base_url)
+    for chunk in chain([first], chunks):
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def discover_links(
+    source_url: str, fetch: Any, max_links: int, stop: Optional[threading.Event] = None
+) -> Iterator[str]:
+    """Yield unique http(s) page URLs found at ``source_url``, following sitemap indexes.
+
+    ``fetch(url)`` must return a context manager that yields the document's
+    Content-Type and an iterator over its body chunks.
+    """
+    seen: Set[str] = {urldefrag(source_url)[0]}
+    sources = [(source_url, 0)]
+    yielded = 0
+    while sources and yielded < max_links:
+        url, depth = sources.pop(0)
+        with fetch(url) as (content_type, chunks):
+            for kind, link in iter_links(chunks, url, content_type):
+                if stop is not None and stop.is_set():
+                    return
+                link = urldefrag(link)[0]
+                if urlparse(link).scheme not in ("http", "https") or link in seen:
+                    continue
+                seen.add(link)
+                if kind == "sitemap":
+                    if depth < MAX_SITEMAP_DEPTH:
+                        sources.append((link, depth + 1))
+                    continue
+                yield link
+                yielded += 1
+                if yielded >= max_links:
+                    return
+
+
+def stream_source_citations(
+    generator: "CitationGenerator", source_url: str, style: "CitationStyle", max_links: int
+) -> Iterator[Dict[str, Any]]:
+    """Cite every link found at ``source_url``, yielding events as work completes.
+
+    Discovered links are fed to the host-aware scheduler while the source is
+    still being parsed. Events are dicts with an ``event`` key:
+
+    - ``citation``: ``url``, ``intext``, ``reference`` plus running counts
+    - ``error``: ``url`` (or the source) and ``message``
+    - ``done``: final ``discovered`` and ``completed`` counts
+    """
+    style_lower = style.lower()
+    counts = {"discovered": 0, "completed": 0}
+    stop = threading.Event()
+    source_errors: List[str] = []
+
+    @contextmanager
+    def fetch(url: str) -> Iterator[Tuple[str, Iterator[bytes]]]:
+        # Same path as page fetches: body deadline, cancellation and breaker accounting.
+        with generator._open_stream(url) as response:
+            chunks = generator._iter_body(response)
+            try:
+                yield response.headers.get("Content-Type", ""), chunks
+            finally:
+                chunks.close()
+
+    def links() -> Iterator[str]:
+        try:
+            for link in discover_links(source_url, fetch, max_links, stop):
+                counts["discovered"] += 1
+                yield link
+        except Exception as exc:  # noqa: BLE001 - reported to the caller as an event
+            source_errors.append(str(exc))
+
+    batch = generator.scheduler.run(
+        links(), lambda url: generator.generate_citation(url, style=style)
+    )
+    try:
+        for url, future in batch:
+            counts["completed"] += 1
+            error = future.exception()
+            citation = generator.citations.get(url, {}).get(style_lower)
+            if error is not None or citation is None:
+                message = str(error) if error else "The citation engine returned no result."
+                yield {"event": "error", "url": url, "message": message, **counts}
+            else:
+                yield {"event": "citation", "url": url, **citation, **counts}
+    finally:
+        stop.set()
+        batch.close()
+
+    for message in source_errors:
+        yield {"event": "error", "url": source_url, "message": f"Could not read source: {message}"}
+    yield {"event": "done", **counts}
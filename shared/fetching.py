@@ -0,0 +1,595 @@
+"""Host-aware fetch scheduling.
+
+Batches are dispatched round-robin across hosts so one site cannot monopolise
+the worker pool, and every host gets an adaptive concurrency limit (AIMD):
+each successful fetch raises the limit additively, while a 429/503 halves it
+and pauses the host for the server's ``Retry-After`` (or a jittered backoff)
+before the request is retried.
+
+Hosts that keep timing out or refusing connections trip a per-host circuit
+breaker, and failed URLs are remembered briefly in a negative cache, so dead
+or tarpitting origins fail fast instead of costing a full timeout every time.
+"""
+
+import os
+import random
+import socket
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+# Per-request timeout passed to requests, in seconds.
+FETCH_TIMEOUT = float(os.environ.get("CITE_FETCH_TIMEOUT", "10"))
+# Cap on the total time spent downloading one response body, in seconds.
+FETCH_BODY_TIMEOUT = float(os.environ.get("CITE_FETCH_BODY_TIMEOUT", "30"))
+# Worker threads per batch.
+FETCH_WORKERS = int(os.environ.get("CITE_FETCH_WORKERS", "8"))
+# Upper bound on concurrent requests to a single host.
+HOST_MAX_CONCURRENCY = int(os.environ.get("CITE_HOST_MAX_CONCURRENCY", "4"))
+# Concurrency a host starts with before AIMD adjusts it.
+HOST_INITIAL_CONCURRENCY = 2
+# Retries after a 429/503 before the throttled response is returned to the caller.
+FETCH_MAX_RETRIES = int(os.environ.get("CITE_FETCH_MAX_RETRIES", "3"))
+# Longest Retry-After we are willing to honour, in seconds.
+MAX_RETRY_AFTER = float(os.environ.get("CITE_MAX_RETRY_AFTER", "30"))
+# Base delay for exponential backoff when no Retry-After header is sent.
+BACKOFF_BASE = 0.5
+# Seconds a host's scheduling and breaker state is kept after it was last used.
+HOST_IDLE_TTL = 300.0
+
+# How long a failed URL is answered from the negative cache, in seconds.
+NEGATIVE_CACHE_TTL = float(os.environ.get("CITE_NEGATIVE_CACHE_TTL", "60"))
+# Consecutive timeouts/connection errors that open a host's circuit.
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("CITE_BREAKER_FAILURE_THRESHOLD", "3"))
+# Seconds an open circuit waits before letting a single trial request through.
+BREAKER_RESET_TIMEOUT = float(os.environ.get("CITE_BREAKER_RESET_TIMEOUT", "30"))
+
+RETRY_STATUSES = frozenset({429, 503})
+
+
+class FetchSkipped(Exception):
+    """Raised instead of fetching when the URL's host circuit is open."""
+
+
+class FetchCancelled(Exception):
+    """Raised when a fetch is abandoned because its batch was cancelled."""
+
+
+def is_host_failure(exc: BaseException) -> bool:
+    """Return True if ``exc`` suggests the host is down or tarpitting."""
+    import requests
+
+    return isinstance(
+        exc,
+        (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError),
+    )
+
+
+def shutdown_response(response: Any) -> None:
+    """Shut down the socket under a streamed ``requests`` response.
+
+    Unlike ``response.close()``, this makes a read blocked in another thread
+    return at once, so a body that keeps trickling in can be cut off.
+    """
+    connection = getattr(response.raw, "connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        # http.client detaches the socket from the connection for close-delimited
+        # bodies; it then lives only under the response's file object.
+        fp = getattr(getattr(response.raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def host_of(url: str) -> str:
+    """Return the lower-cased network location used as the scheduling key."""
+    return urlparse(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Return the delay in seconds encoded by a ``Retry-After`` header, if valid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def retry_delay(attempt: int, retry_after: Optional[float]) -> Optional[float]:
+    """Return a jittered delay before retry ``attempt`` (0-based).
+
+    Returns None when the server asks for longer than ``MAX_RETRY_AFTER``: the
+    request should not be retried at all rather than retried early.
+    """
+    if retry_after is not None:
+        if retry_after > MAX_RETRY_AFTER:
+            return None
+        # Never retry early; spread clients out by up to a quarter of the wait.
+        return retry_after + random.uniform(0, retry_after * 0.25 + 0.1)
+    return random.uniform(0, min(BACKOFF_BASE * (2**attempt), MAX_RETRY_AFTER))
+
+
+class NegativeCache:
+    """Short-lived, bounded memory of URLs whose fetch failed."""
+
+    def __init__(self, ttl: float = NEGATIVE_CACHE_TTL, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached error for ``url`` if it has not expired."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            expires, error = entry
+            if time.monotonic() >= expires:
+                del self._entries[url]
+                return None
+            return error
+
+    def put(self, url: str, error: str) -> None:
+        """Remember that fetching ``url`` failed with ``error``."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries.pop(url, None)
+            self._entries[url] = (time.monotonic() + self.ttl, error)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CircuitBreaker:
+    """Per-host breaker that opens after repeated timeouts or connection errors.
+
+    Closed hosts are fetched normally. After ``failure_threshold`` consecutive
+    failures the host opens for ``reset_timeout`` seconds; then one trial
+    request is let through (half-open) and its outcome closes or re-opens it.
+    Hosts with no failure for ``idle_ttl`` seconds are forgotten.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+        idle_ttl: float = HOST_IDLE_TTL,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.idle_ttl = idle_ttl
+        self._failures: Dict[str, int] = {}
+        self._last_failure: Dict[str, float] = {}
+        self._opened_until: Dict[str, float] = {}
+        self._trial_in_flight: Dict[str, bool] = {}
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def is_open(self, host: str) -> bool:
+        """Return True while ``host`` is rejecting requests."""
+        with self._lock:
+            return self._opened_until.get(host, 0.0) > time.monotonic()
+
+    def allow(self, host: str) -> bool:
+        """Return True if a request to ``host`` may proceed now."""
+        with self._lock:
+            opened_until = self._opened_until.get(host)
+            if opened_until is None:
+                return True
+            if time.monotonic() < opened_until or self._trial_in_flight.get(host):
+                return False
+            self._trial_in_flight[host] = True
+            return True
+
+    def abandon(self, host: str) -> None:
+        """Give back a half-open trial slot whose request was never sent."""
+        with self._lock:
+            self._trial_in_flight.pop(host, None)
+
+    def record_success(self, host: str) -> None:
+        """Close the circuit for ``host``."""
+        with self._lock:
+            self._forget(host)
+
+    def record_failure(self, host: str) -> None:
+        """Count a timeout/connection error; open the circuit at the threshold."""
+        with self._lock:
+            now = time.monotonic()
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            self._last_failure[host] = now
+            if failures >= self.failure_threshold or self._trial_in_flight.pop(host, False):
+                self._opened_until[host] = now + self.reset_timeout
+            self._prune(now)
+
+    def _forget(self, host: str) -> None:
+        self._failures.pop(host, None)
+        self._last_failure.pop(host, None)
+        self._opened_until.pop(host, None)
+        self._trial_in_flight.pop(host, None)
+
+    def _prune(self, now: float) -> None:
+        """Drop closed or expired hosts whose last failure is older than ``idle_ttl``."""
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.idle_ttl
+        for host, last_failure in list(self._last_failure.items()):
+            if (
+                now - last_failure > self.idle_ttl
+                and self._opened_until.get(host, 0.0) <= now
+                and not self._trial_in_flight.get(host)
+            ):
+                self._forget(host)
+
+
+class _HostState:
+    """Mutable concurrency bookkeeping for one host (guarded by the scheduler lock)."""
+
+    __slots__ = ("limit", "in_flight", "blocked_until", "last_used")
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_used = time.monotonic()
+
+    def ready(self, now: float) -> bool:
+        return self.in_flight < int(self.limit) and now >= self.blocked_until
+
+    def idle(self, now: float, ttl: float) -> bool:
+        return self.in_flight == 0 and now >= self.blocked_until and now - self.last_used > ttl
+
+
+class HostScheduler:
+    """Per-host fair scheduler with adaptive concurrency and 429/503 backoff.
+
+    State for hosts unused for ``idle_ttl`` seconds is dropped, so a
+    long-running server does not keep an entry for every host it has seen.
+    """
+
+    def __init__(
+        self,
+        workers: int = FETCH_WORKERS,
+        host_max_concurrency: int = HOST_MAX_CONCURRENCY,
+        host_initial_concurrency: int = HOST_INITIAL_CONCURRENCY,
+        max_retries: int = FETCH_MAX_RETRIES,
+        breaker: Optional[CircuitBreaker] = None,
+        idle_ttl: float = HOST_IDLE_TTL,
+    ):
+        self.workers = max(1, workers)
+        self.host_max_concurrency = max(1, host_max_concurrency)
+        self.host_initial_concurrency = max(
+            1, min(host_initial_concurrency, self.host_max_concurrency)
+        )
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.idle_ttl = idle_ttl
+        self._hosts: Dict[str, _HostState] = {}
+        # Streamed responses whose bodies may still be downloading, per cancel event.
+        self._streams: "weakref.WeakKeyDictionary[threading.Event, weakref.WeakSet[Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._next_prune = 0.0
+        self._cond = threading.Condition()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(float(self.host_initial_concurrency))
+        return state
+
+    def _prune(self, now: float) -> None:
+        """Drop idle hosts; called with the scheduler lock held."""
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.idle_ttl
+        for host, state in list(self._hosts.items()):
+            if state.idle(now, self.idle_ttl):
+                del self._hosts[host]
+
+    def host_limit(self, host: str) -> int:
+        """Return the current concurrency limit for ``host``."""
+        with self._cond:
+            return int(self._state(host).limit)
+
+    def acquire(self, host: str, cancel: Optional[threading.Event] = None) -> None:
+        """Block until ``host`` has a free slot and is not backing off.
+
+        Raises :class:`FetchCancelled` if ``cancel`` is set while waiting (see
+        :meth:`cancel`).
+        """
+        with self._cond:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise FetchCancelled(f"fetch from {host} cancelled")
+                state = self._state(host)
+                now = time.monotonic()
+                if state.ready(now):
+                    state.in_flight += 1
+                    return
+                timeout = state.blocked_until - now if state.blocked_until > now else None
+                self._cond.wait(timeout)
+
+    def release(
+        self, host: str, throttled: bool = False, delay: float = 0.0, success: bool = True
+    ) -> None:
+        """Return a slot for ``host`` and adjust its limit (AIMD).
+
+        ``throttled`` halves the limit and pauses the host for ``delay`` seconds;
+        ``success`` grows it by ``1/limit``, i.e. roughly one slot per window.
+        """
+        with self._cond:
+            now = time.monotonic()
+            state = self._state(host)
+            state.in_flight -= 1
+            state.last_used = now
+            if throttled:
+                state.limit = max(1.0, state.limit / 2)
+                state.blocked_until = max(state.blocked_until, now + delay)
+            elif success:
+                state.limit = min(float(self.host_max_concurrency), state.limit + 1 / state.limit)
+            self._prune(now)
+            self._cond.notify_all()
+
+    def cancel(self, event: threading.Event) -> None:
+        """Set ``event`` and make the fetches watching it give up promptly.
+
+        Fetches waiting for a host slot or a memory reservation are woken, and
+        the sockets of streamed responses still downloading under ``event``
+        are shut down so blocked body reads return. A request still waiting for
+        its response headers is only bounded by its own timeout.
+        """
+        # Imported here: shared.memory imports this module.
+        from shared.memory import wake_waiters
+
+        event.set()
+        with self._cond:
+            self._cond.notify_all()
+            streams = list(self._streams.pop(event, ()))
+        wake_waiters()
+        for response in streams:
+            shutdown_response(response)
+
+    def fetch(self, url: str, cancel: Optional[threading.Event] = None, **kwargs: Any) -> Any:
+        """``requests.get`` ``url`` within its host's limits, retrying 429/503.
+
+        Exceptions from ``requests`` propagate, and :class:`FetchSkipped` is
+        raised without touching the network while the host's circuit is open.
+        If the host is still throttling after ``max_retries`` retries, or asks
+        to be left alone for longer than ``MAX_RETRY_AFTER``, the throttled
+        response is returned as-is. Once ``cancel`` is set, no new request is
+        sent (including retries) and :class:`FetchCancelled` is raised instead.
+
+        With ``stream=True`` the body can still stall or break after the
+        headers arrive, so the host's breaker outcome is left to the caller,
+        which must report it with :meth:`record_body` once the body is read.
+        """
+        import requests
+
+        host = host_of(url)
+        attempt = 0
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise FetchCancelled(f"fetch from {host} cancelled")
+            if not self.breaker.allow(host):
+                raise FetchSkipped(f"{host} is unavailable (circuit open)")
+            try:
+                self.acquire(host, cancel)
+            except FetchCancelled:
+                self.breaker.abandon(host)
+                raise
+            try:
+                response = requests.get(url, **kwargs)
+            except BaseException as exc:
+                self.release(host, success=False)
+                self._record_outcome(host, exc)
+                raise
+
+            status = getattr(response, "status_code", None)
+            delay = None
+            if status in RETRY_STATUSES and attempt < self.max_retries:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = retry_delay(attempt, retry_after)
+            if delay is not None:
+                self.breaker.record_success(host)
+                self.release(host, throttled=True, delay=delay)
+                response.close()
+                attempt += 1
+                continue
+
+            if not kwargs.get("stream"):
+                self.breaker.record_success(host)
+            elif cancel is not None:
+                self._track_stream(response, cancel)
+            throttled = status in RETRY_STATUSES
+            self.release(host, throttled=throttled, success=not throttled)
+            return response
+
+    def _track_stream(self, response: Any, cancel: threading.Event) -> None:
+        """Remember ``response`` so :meth:`cancel` can cut its body download short."""
+        with self._cond:
+            if not cancel.is_set():
+                self._streams.setdefault(cancel, weakref.WeakSet()).add(response)
+                return
+        shutdown_response(response)
+
+    def record_body(self, url: str, error: Optional[BaseException] = None) -> None:
+        """Report how reading the body of a ``stream=True`` :meth:`fetch` ended.
+
+        Timeouts and broken connections count against the host's circuit like
+        a failed request, a cancelled read hands back any half-open trial slot,
+        and anything else (including HTTP error statuses) closes the circuit.
+        """
+        host = host_of(url)
+        if isinstance(error, FetchCancelled):
+            self.breaker.abandon(host)
+        else:
+            self._record_outcome(host, error)
+
+    def _record_outcome(self, host: str, error: Optional[BaseException]) -> None:
+        if error is not None and is_host_failure(error):
+            self.breaker.record_failure(host)
+        else:
+            # The host answered (e.g. too many redirects); it is not down.
+            self.breaker.record_success(host)
+
+    def _next_ready(
+        self, pending: "OrderedDict[str, Deque[str]]", active: Dict[str, int]
+    ) -> Optional[str]:
+        """Pop the next URL from the first ready host, rotating hosts round-robin.
+
+        ``active`` counts this batch's dispatched-but-unfinished URLs per host, so
+        tasks that have not reached :meth:`acquire` yet still count against the limit.
+        """
+        now = time.monotonic()
+        for host in list(pending):
+            state = self._state(host)
+            if state.ready(now) and active.get(host, 0) < int(state.limit):
+                queue = pending.pop(host)
+                url = queue.popleft()
+                if queue:
+                    pending[host] = queue  # re-append: this host goes to the back
+                return url
+        return None
+
+    def _next_wakeup(self, pending: "OrderedDict[str, Deque[str]]") -> Optional[float]:
+        """Seconds until the earliest backing-off pending host unblocks, if any."""
+        now = time.monotonic()
+        waits = [self._state(host).blocked_until - now for host in pending]
+        waits = [delay for delay in waits if delay > 0]
+        return min(waits) if waits else None
+
+    def run(
+        self,
+        urls: Iterable[str],
+        func: Callable[[str], Any],
+        workers: Optional[int] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Iterator[Tuple[str, Future]]:
+        """Apply ``func`` to each URL concurrently, yielding ``(url, future)`` as they finish.
+
+        URLs are grouped by host and dispatched round-robin, only to hosts with
+        spare capacity, so a batch dominated by one site still makes progress
+        on every other site. ``func`` is expected to fetch through :meth:`fetch`.
+
+        ``urls`` may be a lazy iterable (e.g. links streamed out of a sitemap):
+        anything other than a list or tuple is consumed in a background thread
+        and its URLs are dispatched as they arrive.
+
+        On ``KeyboardInterrupt`` the batch's ``cancel`` event (the one ``func``
+        fetches with) is cancelled before the worker pool is shut down, so the
+        interrupt is not held up by fetches still in flight.
+        """
+        pending: "OrderedDict[str, Deque[str]]" = OrderedDict()
+        max_workers = max(1, workers or self.workers)
+        running: Dict[Future, str] = {}
+        active: Dict[str, int] = {}
+        source = {"done": True, "stopped": False, "error": None}
+
+        def enqueue(url: str) -> None:
+            pending.setdefault(host_of(url), deque()).append(url)
+
+        def feed() -> None:
+            try:
+                for url in urls:
+                    with self._cond:
+                        if source["stopped"]:
+                            return
+                        enqueue(url)
+                        self._cond.notify_all()
+            except Exception as exc:  # noqa: BLE001 - re-raised in the consuming thread
+                source["error"] = exc
+            finally:
+                with self._cond:
+                    source["done"] = True
+                    self._cond.notify_all()
+
+        def notify(_: Future) -> None:
+            with self._cond:
+                self._cond.notify_all()
+
+        if isinstance(urls, (list, tuple)):
+            for url in urls:
+                enqueue(url)
+        else:
+            source["done"] = False
+            threading.Thread(target=feed, name="host-scheduler-feed", daemon=True).start()
+
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                with self._cond:
+                    if source["done"] and not pending and not running:
+                        break
+                    dispatched = False
+                    while pending and len(running) < max_workers:
+                        url = self._next_ready(pending, active)
+                        if url is None:
+                            break
+                        future = pool.submit(func, url)
+                        running[future] = url
+                        active[host_of(url)] = active.get(host_of(url), 0) + 1
+                        future.add_done_callback(notify)
+                        dispatched = True
+                    if not dispatched and not any(future.done() for future in running):
+                        self._cond.wait(self._next_wakeup(pending) if pending else None)
+
+                finished = [future for future in running if future.done()]
+                for future in finished:
+                    url = running.pop(future)
+                    active[host_of(url)] -= 1
+                    yield url, future
+        except KeyboardInterrupt:
+            # Cancel before the pool shutdown below waits for in-flight fetches.
+            if cancel is not None:
+                self.cancel(cancel)
+            raise
+        finally:
+            pool.shutdown(wait=True)
+            with self._cond:
+                source["stopped"] = True
+
+        if source["error"] is not None:
+            raise source["error"]
+
+
+_default_scheduler: Optional[HostScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_host_scheduler() -> HostScheduler:
+    """Return the process-wide scheduler, so host limits span concurrent batches."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = HostScheduler()
+        return _default_scheduler
+
+
+_default_negative_cache: Optional[NegativeCache] = None
+
+
+def get_negative_cache() -> NegativeCache:
+    """Return the process-wide negative cache of recently failed URLs."""
+    global _default_negative_cache
+    with _default_scheduler_lock:
+        if _default_negative_cache is None:
+            _default_negative_cache = NegativeCache()
+        return _default_negative_cache
@@ -0,0 +1,130 @@
+"""Process-wide memory budget for in-flight page bodies and parse trees.
+
+Every page fetch reserves an estimate of the memory its body and parse tree
+will need before the request is sent. New fetches wait while the budget is
+exhausted, which applies backpressure to the scheduler instead of letting a
+burst of multi-megabyte pages push a worker past its container limit.
+"""
+
+import os
+import threading
+import time
+import weakref
+from typing import Optional
+
+from shared.fetching import FetchCancelled
+
+# Total bytes that in-flight bodies and parse trees may claim.
+MEMORY_BUDGET_BYTES = int(float(os.environ.get("CITE_MEMORY_BUDGET_MB", "256")) * 1024 * 1024)
+# Bodies are truncated at this size; titles and metadata live near the top anyway.
+MAX_PAGE_BYTES = int(float(os.environ.get("CITE_MAX_PAGE_MB", "5")) * 1024 * 1024)
+# Body size assumed before the response headers say otherwise.
+DEFAULT_PAGE_BYTES = 128 * 1024
+# A BeautifulSoup tree takes roughly 15-30x the raw HTML size (measured with tracemalloc).
+PARSE_TREE_FACTOR = 32
+
+
+def page_reservation(body_bytes: int) -> int:
+    """Bytes to reserve for a body of ``body_bytes`` plus its parse tree."""
+    return min(body_bytes, MAX_PAGE_BYTES) * (1 + PARSE_TREE_FACTOR)
+
+
+class MemoryBudget:
+    """Byte-counting admission control.
+
+    :meth:`acquire` blocks while the budget is exhausted, but always admits a
+    request when nothing else is in flight so oversized pages cannot deadlock.
+    :meth:`resize` never blocks: a reservation that turns out too small grows
+    immediately (briefly over-committing) and new admissions absorb the cost.
+    """
+
+    def __init__(self, limit_bytes: int = MEMORY_BUDGET_BYTES):
+        self.limit_bytes = limit_bytes
+        self.in_use = 0
+        self._cond = threading.Condition()
+        _budgets.add(self)
+
+    def acquire(
+        self, nbytes: int, timeout: Optional[float] = None, cancel: Optional[threading.Event] = None
+    ) -> bool:
+        """Reserve ``nbytes``; return False if ``timeout`` expires or ``cancel`` is set first.
+
+        Whoever sets ``cancel`` must call :func:`wake_waiters` (as
+        ``HostScheduler.cancel`` does) so a blocked caller notices at once.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self.in_use > 0 and self.in_use + nbytes > self.limit_bytes:
+                if cancel is not None and cancel.is_set():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_use += nbytes
+            return True
+
+    def wake(self) -> None:
+        """Wake blocked :meth:`acquire` calls so they re-check their cancel event."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def resize(self, old_bytes: int, new_bytes: int) -> None:
+        """Change an existing reservation from ``old_bytes`` to ``new_bytes``."""
+        with self._cond:
+            self.in_use += new_bytes - old_bytes
+            if new_bytes < old_bytes:
+                self._cond.notify_all()
+
+    def release(self, nbytes: int) -> None:
+        """Return ``nbytes`` to the budget."""
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+
+class Reservation:
+    """A resizable claim on a :class:`MemoryBudget`, released on context exit.
+
+    Entering raises :class:`FetchCancelled` if ``cancel`` is set while waiting.
+    """
+
+    def __init__(self, budget: MemoryBudget, nbytes: int, cancel: Optional[threading.Event] = None):
+        self.budget = budget
+        self.nbytes = nbytes
+        self.cancel = cancel
+
+    def __enter__(self) -> "Reservation":
+        if not self.budget.acquire(self.nbytes, cancel=self.cancel):
+            raise FetchCancelled("memory reservation cancelled")
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.budget.release(self.nbytes)
+        self.nbytes = 0
+
+    def resize(self, nbytes: int) -> None:
+        self.budget.resize(self.nbytes, nbytes)
+        self.nbytes = nbytes
+
+
+_budgets: "weakref.WeakSet[MemoryBudget]" = weakref.WeakSet()
+
+
+def wake_waiters() -> None:
+    """Wake callers blocked in :meth:`MemoryBudget.acquire` on every budget."""
+    for budget in list(_budgets):
+        budget.wake()
+
+
+_default_budget: Optional[MemoryBudget] = None
+_default_budget_lock = threading.Lock()
+
+
+def get_memory_budget() -> MemoryBudget:
+    """Return the process-wide memory budget configured from the environment."""
+    global _default_budget
+    with _default_budget_lock:
+        if _default_budget is None:
+            _default_budget = MemoryBudget()
+        return _default_budget
@@ -0,0 +1,114 @@
+"""Compact, versioned citation style templates for client-side rendering.
+
+Each style's ``intext`` and ``reference`` strings mirror the
+``CitationGenerator._format_*`` methods (the tests check they render
+identically), so a client holding a page's metadata record can render every
+style locally. Template syntax:
+
+- ``{field}`` inserts ``title``, ``author``, ``domain``, ``url`` or ``sponsor``
+- ``{date:FORMAT}`` inserts the access date; FORMAT uses the strftime codes
+  ``%d`` (zero-padded day), ``%b`` / ``%B`` (short / full English month) and
+  ``%Y``
+- ``{?field}...{/field}`` keeps the enclosed text only when ``field`` is set
+
+A missing title renders as the style's ``unknown_title``. Bump
+:data:`STYLE_TEMPLATES_VERSION` whenever a template changes so clients
+refetch them.
+"""
+
+import re
+from datetime import date
+from typing import Any, Dict, Mapping, Optional
+
+from shared.parsing import NO_TITLE
+
+STYLE_TEMPLATES_VERSION = 1
+
+STYLE_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "harvard": {
+        "unknown_title": "Unknown Title",
+        "intext": "({title}, {date:%Y})",
+        "reference": "{title} {date:%Y}, <em>{domain}</em>, viewed {date:%d %B %Y}, &lt;{url}&gt;.",
+    },
+    "unsw": {
+        "unknown_title": "Unknown website",
+        "intext": "({author} {date:%Y})",
+        "reference": (
+            "{author} {date:%Y}, <em>{title}</em>, {?sponsor}{sponsor}, {/sponsor}"
+            "accessed {date:%d %B %Y}, &lt;{url}&gt;."
+        ),
+    },
+    "mla": {
+        "unknown_title": "Unknown Title",
+        "intext": '("{title}")',
+        "reference": '"{title}." <em>{domain}</em>, {date:%d %b. %Y}, {url}.',
+    },
+    "chicago": {
+        "unknown_title": "Unknown Title",
+        "intext": "({title}, {date:%B %d, %Y})",
+        "reference": '"{title}." {domain}. Accessed {date:%B %d, %Y}. {url}.',
+    },
+    "apa": {
+        "unknown_title": "Unknown Title",
+        "intext": "({title}, {date:%Y})",
+        "reference": "{title}. ({date:%Y}, {date:%B %d}). <em>{domain}</em>. {url}",
+    },
+    "ieee": {
+        "unknown_title": "Unknown Title",
+        "intext": "[{title}]",
+        "reference": '"{title}," {domain}, {date:%d %B %Y}. [Online]. Available: {url}',
+    },
+    "vancouver": {
+        "unknown_title": "Unknown Title",
+        "intext": "({title})",
+        "reference": (
+            "{title} [Internet]. {domain}; {date:%d %B %Y} [cited {date:%d %B %Y}]. "
+            "Available from: {url}"
+        ),
+    },
+}
+
+_OPTIONAL_RE = re.compile(r"\{\?(\w+)\}(.*?)\{/\1\}")
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)(?::([^}]*))?\}")
+
+
+def known_title(title: Optional[str]) -> Optional[str]:
+    """Return ``title`` unless it is the no-title marker or a fetch error, as the formatters do."""
+    if not title or title == NO_TITLE or title.startswith("Error"):
+        return None
+    return title
+
+
+def style_templates() -> Dict[str, Any]:
+    """Return the versioned template definition served to clients."""
+    return {"version": STYLE_TEMPLATES_VERSION, "styles": STYLE_TEMPLATES}
+
+
+def render_citation(style: str, record: Mapping[str, Any]) -> Dict[str, str]:
+    """Render ``record`` (a metadata record with an ISO ``accessed`` date) in ``style``.
+
+    Unknown styles fall back to Harvard, like ``CitationGenerator.generate_citation``.
+    """
+    template = STYLE_TEMPLATES.get(style.lower(), STYLE_TEMPLATES["harvard"])
+    accessed = date.fromisoformat(record["accessed"])
+    fields = {
+        "title": known_title(record.get("title")) or template["unknown_title"],
+        "author": record.get("author") or "",
+        "domain": record.get("domain") or "",
+        "url": record.get("url") or "",
+        "sponsor": record.get("sponsor") or "",
+    }
+
+    def optional(match: "re.Match[str]") -> str:
+        return match.group(2) if fields.get(match.group(1)) else ""
+
+    def placeholder(match: "re.Match[str]") -> str:
+        name, spec = match.groups()
+        if name == "date":
+            return accessed.strftime(spec)
+        return str(fields[name])
+
+    def render(text: str) -> str:
+        return _PLACEHOLDER_RE.sub(placeholder, _OPTIONAL_RE.sub(optional, text))
+
+    return {"intext": render(template["intext"]), "reference": render(template["reference"])}
@@ -1,11 +1,30 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+import pytest
 from fastapi.testclient import TestClient
 
 from agent import main as agent_main
+from agent.response_cache import batch_key, etag_matches, get_response_cache
 from shared.citation_generator import CitationGenerator
+from shared.fetching import FetchCancelled
+from shared.parsing import PageMetadata
 
 client = TestClient(agent_main.app)
 
 
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    get_response_cache().clear()
+    yield
+    get_response_cache().clear()
+
+
 def test_generate_citations_deterministic(monkeypatch):
     def fake_generate(self: CitationGenerator, url: str, style: str = "harvard") -> str:
         self.citations.setdefault(url, {})[style.lower()] = {
@@ -53,3 +72,242 @@ def test_list_supported_styles():
     styles = response.json()
     assert "unsw" in styles
     assert "harvard" in styles
+
+
+def test_import_does_not_load_ai_or_parser_stack():
+    probe = (
+        "import sys, agent.main; "
+        "print(sorted(m for m in ('connectonion', 'bs4', 'requests') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_citations_from_source_streams_ndjson(monkeypatch):
+    def fake_stream(generator, source_url, style, max_links):
+        yield {
+            "event": "citation",
+            "url": "https://example.com/a",
+            "intext": "(Author 2025)",
+            "reference": "Author 2025, <em>Title</em>, &lt;https://example.com/a&gt;.",
+            "discovered": 1,
+            "completed": 1,
+        }
+        yield {"event": "done", "discovered": 1, "completed": 1}
+
+    monkeypatch.setattr(agent_main, "stream_source_citations", fake_stream)
+
+    response = client.post(
+        "/api/citations/from-source",
+        json={"source_url": "https://example.com/sitemap.xml", "style": "unsw"},
+    )
+
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["reference"] == "Author 2025, Title, <https://example.com/a>."
+    assert events[-1]["event"] == "done"
+
+
+def test_generate_repeated_batch_is_served_from_cache(monkeypatch):
+    calls = []
+
+    def fake_generate(self: CitationGenerator, url: str, style: str = "harvard") -> str:
+        calls.append(url)
+        self.citations.setdefault(url, {})[style.lower()] = {
+            "intext": f"({url})",
+            "reference": f"Reference for {url}.",
+        }
+        return "OK"
+
+    monkeypatch.setattr(CitationGenerator, "generate_citation", fake_generate)
+    body = {"urls": ["https://a.example/", "https://b.example/"], "style": "apa", "use_ai": False}
+
+    first = client.post("/api/citations/generate", json=body)
+    reordered = client.post(
+        "/api/citations/generate", json={**body, "urls": list(reversed(body["urls"]))}
+    )
+
+    assert first.status_code == reordered.status_code == 200
+    assert len(calls) == 2
+    assert first.headers["ETag"]
+    # Same URL set, so no new work, but sources are still listed in request order.
+    assert reordered.text.index("https://b.example/") < reordered.text.index("https://a.example/")
+    assert reordered.headers["ETag"] != first.headers["ETag"]
+
+
+def test_generate_answers_if_none_match_with_304(monkeypatch):
+    def fake_generate(self: CitationGenerator, url: str, style: str = "harvard") -> str:
+        self.citations.setdefault(url, {})[style.lower()] = {"intext": "(A)", "reference": "A."}
+        return "OK"
+
+    monkeypatch.setattr(CitationGenerator, "generate_citation", fake_generate)
+    body = {"urls": ["https://example.com"], "style": "mla", "use_ai": False}
+
+    etag = client.post("/api/citations/generate", json=body).headers["ETag"]
+    revalidated = client.post("/api/citations/generate", json=body, headers={"If-None-Match": etag})
+    stale = client.post(
+        "/api/citations/generate", json=body, headers={"If-None-Match": '"something-else"'}
+    )
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert revalidated.content == b""
+    assert stale.status_code == 200
+
+
+def test_generate_does_not_cache_failed_batches(monkeypatch):
+    calls = []
+
+    def failing_generate(self: CitationGenerator, url: str, style: str = "harvard") -> str:
+        calls.append(url)
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(CitationGenerator, "generate_citation", failing_generate)
+    body = {"urls": ["https://example.com"], "style": "harvard", "use_ai": False}
+
+    client.post("/api/citations/generate", json=body)
+    client.post("/api/citations/generate", json=body)
+
+    assert len(calls) == 2
+
+
+def test_generate_does_not_cache_failed_fetches(monkeypatch, tmp_path):
+    import requests
+
+    monkeypatch.chdir(tmp_path)  # generate_citation appends to citations_output.txt
+
+    def refused(url, **kwargs):
+        raise requests.ConnectionError("refused")
+
+    calls = []
+    get_page_metadata = CitationGenerator._get_page_metadata
+
+    def counting_get_page_metadata(self, url, domain, want_author):
+        calls.append(url)
+        return get_page_metadata(self, url, domain, want_author)
+
+    monkeypatch.setattr(requests, "get", refused)
+    monkeypatch.setattr(CitationGenerator, "_get_page_metadata", counting_get_page_metadata)
+    url = "https://unreachable-cache-test.example/"
+    body = {"urls": [url], "style": "harvard", "use_ai": False}
+
+    first = client.post("/api/citations/generate", json=body)
+    client.post("/api/citations/generate", json=body)
+
+    assert "Unknown Title" in first.content.decode()
+    assert get_response_cache().get(batch_key([url], "harvard", False)) is None
+    assert len(calls) == 2
+
+
+def test_batch_key_covers_style_ai_flag_and_access_day():
+    urls = ["https://a.example/", "https://b.example/"]
+    day = date(2025, 11, 10)
+    key = batch_key(urls, "APA", False, day)
+
+    assert key == batch_key(list(reversed(urls)) + urls[:1], "apa", False, day)
+    assert key != batch_key(urls, "mla", False, day)
+    assert key != batch_key(urls, "apa", True, day)
+    assert key != batch_key(urls, "apa", False, date(2025, 11, 11))
+
+
+def test_etag_matches_handles_lists_weak_tags_and_wildcard():
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+
+
+def test_generate_deadline_returns_partial_results(monkeypatch):
+    def fake_generate(self: CitationGenerator, url: str, style: str = "harvard") -> str:
+        if "slow" in url:
+            self.cancel.wait(5)
+            raise FetchCancelled("download cancelled")
+        self.citations.setdefault(url, {})[style.lower()] = {
+            "intext": "(Fast Author 2025)",
+            "reference": "Fast Author 2025, Fast Title.",
+        }
+        return "OK"
+
+    monkeypatch.setattr(CitationGenerator, "generate_citation", fake_generate)
+    body = {
+        "urls": ["https://fast.example.com/", "https://slow.example.org/"],
+        "style": "unsw",
+        "use_ai": False,
+        "deadline_seconds": 0.5,
+    }
+
+    start = time.monotonic()
+    response = client.post("/api/citations/generate", json=body)
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 200
+    assert elapsed < 0.5
+    assert response.headers["X-Citations-Partial"] == "1"
+    text = response.text
+    assert "Fast Author" in text
+    assert "(Slow (Organisation) " in text
+    assert text.count("Note: Partial result.") == 1
+    # Partial batches are never served from the response cache.
+    assert get_response_cache().get(batch_key(body["urls"], "unsw", False)) is None
+
+
+def test_generate_rejects_non_positive_deadline():
+    response = client.post(
+        "/api/citations/generate",
+        json={"urls": ["https://example.com"], "deadline_seconds": 0},
+    )
+    assert response.status_code == 422
+
+
+def test_metadata_returns_structured_records(monkeypatch):
+    def fake_metadata(self, url, domain, want_author):
+        if "broken" in url:
+            error = "Error fetching page: timed out"
+            return PageMetadata(title=error, author="Broken", error=error)
+        return PageMetadata(title="Health Topics", author="Department of Health")
+
+    monkeypatch.setattr(CitationGenerator, "_get_page_metadata", fake_metadata)
+
+    response = client.post(
+        "/api/citations/metadata",
+        json={"urls": ["https://www.health.gov.au/topics", "https://broken.example.com/"]},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["templates_version"] == client.get("/api/citations/templates").json()["version"]
+    found, failed = data["records"]
+    assert found["title"] == "Health Topics"
+    assert found["author"] == "Department of Health"
+    assert found["sponsor"] == "Government"
+    assert found["accessed"] == date.today().isoformat()
+    assert found["error"] is None
+    assert failed["title"] is None
+    assert failed["error"].startswith("Error fetching page")
+
+
+def test_collect_metadata_leaves_cancelled_fetches_partial(monkeypatch):
+    def fake_metadata(self, url, domain, want_author):
+        if "slow" in url:
+            raise FetchCancelled("download cancelled")
+        return PageMetadata(title="Fast Page", author="Fast Author")
+
+    monkeypatch.setattr(CitationGenerator, "_get_page_metadata", fake_metadata)
+    generator = CitationGenerator(cancel=threading.Event())
+    urls = ["https://fast.example.com/", "https://slow.example.org/"]
+
+    records = agent_main._collect_metadata(generator, urls, {})
+
+    assert records["https://fast.example.com/"]["title"] == "Fast Page"
+    assert "https://slow.example.org/" not in records
+
+
+def test_templates_render_all_styles():
+    templates = client.get("/api/citations/templates").json()
+    assert set(templates["styles"]) == set(client.get("/api/citations/styles").json())
@@ -0,0 +1,107 @@
+"""Tests for the linear-time, CPU-budgeted byline stage."""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from bs4 import BeautifulSoup
+
+from shared.byline import byline_from_text, find_byline, visible_text_window
+from shared.citation_generator import CitationGenerator
+
+# Inputs that make the previous backtracking patterns take seconds on a few hundred KB.
+PATHOLOGICAL_TEXTS = {
+    "repeated_roles": ("By " + "reporter " * 3) * 40000,
+    "repeated_by": "By " * 200000,
+    "long_word_run": "By " + "staff " * 200000 + "x",
+    "near_miss_names": "By reporter " + "Jane Smith" * 50000,
+}
+
+
+class TestBylineFromText(unittest.TestCase):
+    """Test cases for byline_from_text."""
+
+    def test_role_byline(self):
+        """Test that role words between "By" and the name are skipped."""
+        self.assertEqual(byline_from_text("By senior staff writer Hannah Lee"), "Hannah Lee")
+
+    def test_simple_byline_near_headline_only(self):
+        """Test that a bare "By First Last" counts only close to the headline."""
+        self.assertEqual(byline_from_text("By Thomas Reid, 3 March 2024"), "Thomas Reid")
+        far = "x " * 1000 + "By Thomas Reid."
+        self.assertIsNone(byline_from_text(far))
+        self.assertEqual(byline_from_text(far, headline_offset=1500), "Thomas Reid")
+
+    def test_written_by_and_author_label(self):
+        """Test the weaker "Written by" and "Author:" forms and their ranking."""
+        self.assertEqual(byline_from_text("Tips. Written by Olivia Chen."), "Olivia Chen")
+        self.assertEqual(byline_from_text("Author: Priya Natarajan"), "Priya Natarajan")
+        text = "Author: Priya Natarajan. Written by Olivia Chen."
+        self.assertEqual(byline_from_text(text), "Olivia Chen")
+
+    def test_rejects_non_names(self):
+        """Test that lowercase words, initials and run-on tokens are not names."""
+        self.assertIsNone(byline_from_text("By the staff reporter team"))
+        self.assertIsNone(byline_from_text("By Jane Smith2023"))
+        self.assertIsNone(byline_from_text("NearBy Jane Smith"))
+
+    def test_pathological_inputs_finish_quickly(self):
+        """Test that adversarial inputs are scanned in linear time without a budget."""
+        for name, text in PATHOLOGICAL_TEXTS.items():
+            with self.subTest(text=name):
+                start = time.process_time()
+                byline_from_text(text)
+                self.assertLess(time.process_time() - start, 1.0)
+
+    def test_exhausted_budget_gives_up(self):
+        """Test that the stage returns nothing once its CPU budget is spent."""
+        self.assertIsNone(byline_from_text("By staff reporter Jane Doe", budget=0))
+
+
+class TestFindByline(unittest.TestCase):
+    """Test cases for the soup-level window and budget."""
+
+    def test_window_starts_near_headline(self):
+        """Test that text long before the headline is dropped from the window."""
+        html = "<p>" + "filler " * 2000 + "</p><h1>Headline</h1><p>By Jane Doe</p>"
+        text, offset = visible_text_window(BeautifulSoup(html, "html.parser"), lead_chars=100)
+        self.assertLessEqual(offset, 101)
+        self.assertTrue(text[offset:].startswith("Headline"))
+        self.assertEqual(find_byline(BeautifulSoup(html, "html.parser")), "Jane Doe")
+
+    def test_ignores_scripts_and_text_past_window(self):
+        """Test that script text and bylines beyond the window are not used."""
+        html = (
+            "<h1>Headline</h1><script>var s = 'By staff reporter Jane Doe';</script>"
+            "<p>" + "words " * 5000 + "</p><p>By staff reporter John Roe</p>"
+        )
+        self.assertIsNone(find_byline(BeautifulSoup(html, "html.parser")))
+
+    def test_elements_do_not_run_together(self):
+        """Test that adjacent elements are separated before tokenizing."""
+        html = "<h1>Council Meeting</h1><span>By</span><a>Jane Doe</a>"
+        self.assertEqual(find_byline(BeautifulSoup(html, "html.parser")), "Jane Doe")
+
+    def test_pathological_page_within_budget(self):
+        """Test that a hostile page is cut short by the per-page budget."""
+        html = "<h1>Headline</h1>" + "<p>By reporter reporter reporter</p>" * 40000
+        soup = BeautifulSoup(html, "lxml")
+        start = time.thread_time()
+        self.assertIsNone(find_byline(soup, budget=0.05))
+        self.assertLess(time.thread_time() - start, 0.5)
+
+    def test_budget_exhaustion_falls_through_to_next_stage(self):
+        """Test that _determine_author moves on to the element stage when out of budget."""
+        html = (
+            "<h1>Headline</h1><p>By staff reporter Jane Doe</p>"
+            '<span class="author-name">Daniel Moreau</span>'
+        )
+        soup = BeautifulSoup(html, "html.parser")
+        generator = CitationGenerator()
+        self.assertEqual(generator._determine_author(soup, "example.com"), "Jane Doe")
+        with patch("shared.byline._Budget.expired", return_value=True):
+            self.assertEqual(generator._determine_author(soup, "example.com"), "Daniel Moreau")
+
+
+if __name__ == "__main__":
+    unittest.main()
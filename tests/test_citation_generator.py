@@ -1,9 +1,20 @@
 """Tests for CitationGenerator class."""
 
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 
+import requests
+
 from shared.citation_generator import CitationGenerator
+from shared.fetching import CircuitBreaker, FetchCancelled, HostScheduler, NegativeCache
+from shared.parsing import PageMetadata
 
 
 class TestCitationGenerator(unittest.TestCase):
@@ -45,13 +56,150 @@ class TestCitationGenerator(unittest.TestCase):
     def test_get_page_title(self, mock_get):
         """Test fetching page title."""
         mock_response = Mock()
-        mock_response.content = b'<html><head><title>Test Page</title></head></html>'
+        mock_response.headers = {}
+        mock_response.iter_content = Mock(
+            return_value=[b"<html><head><title>Test Page</title></head></html>"]
+        )
         mock_response.raise_for_status = Mock()
         mock_get.return_value = mock_response
 
         title = self.generator.get_page_title("https://example.com")
         self.assertEqual(title, "Test Page")
 
+    @patch("shared.citation_generator.requests.get")
+    def test_failed_fetch_uses_domain_fallback_once(self, mock_get):
+        """Test that a failed UNSW fetch is not retried and falls back to the domain."""
+        mock_get.side_effect = requests.ConnectionError("refused")
+        generator = CitationGenerator(
+            scheduler=HostScheduler(breaker=CircuitBreaker(failure_threshold=5)),
+            negative_cache=NegativeCache(),
+        )
+        with patch.object(generator, "_update_citation_output"):
+            generator.generate_citation("https://www.example.com/a", style="unsw")
+            generator.generate_citation("https://www.example.com/a", style="unsw")
+
+        self.assertEqual(mock_get.call_count, 1)
+        reference = generator.citations["https://www.example.com/a"]["unsw"]["reference"]
+        self.assertTrue(reference.startswith("Example "))
+        self.assertIn("Unknown website", reference)
+
+    @patch("shared.citation_generator.requests.get")
+    def test_stalled_body_opens_circuit(self, mock_get):
+        """Test that bodies which break off after the headers count as host failures."""
+        response = Mock()
+        response.headers = {}
+        response.iter_content = Mock(side_effect=requests.ConnectionError("read timed out"))
+        mock_get.return_value = response
+        generator = CitationGenerator(
+            scheduler=HostScheduler(breaker=CircuitBreaker(failure_threshold=2)),
+            negative_cache=NegativeCache(ttl=0),
+        )
+
+        for _ in range(2):
+            _, error = generator._fetch_page("https://tarpit.example/")
+            self.assertIn("read timed out", error)
+        _, error = generator._fetch_page("https://tarpit.example/")
+
+        self.assertIn("circuit open", error)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("shared.citation_generator.FETCH_BODY_TIMEOUT", 0.05)
+    @patch("shared.citation_generator.requests.get")
+    def test_slow_body_hits_download_deadline(self, mock_get):
+        """Test that a body trickling in chunk by chunk is cut off at the overall deadline."""
+
+        def trickle(chunk_size):
+            while True:
+                time.sleep(0.02)
+                yield b"x"
+
+        response = Mock()
+        response.headers = {}
+        response.iter_content = trickle
+        mock_get.return_value = response
+
+        _, error = self.generator._fetch_page("https://slow.example/")
+
+        self.assertIn("not received within", error)
+
+    @patch("shared.citation_generator.FETCH_BODY_TIMEOUT", 0.3)
+    def test_close_delimited_slow_body_hits_download_deadline(self):
+        """Test that a close-delimited body cut off by the deadline is not returned as a success."""
+        url = self._stalled_server()
+        generator = CitationGenerator(scheduler=HostScheduler(), negative_cache=NegativeCache())
+
+        start = time.monotonic()
+        content, error = generator._fetch_page(url)
+        elapsed = time.monotonic() - start
+
+        self.assertIsNone(content)
+        self.assertIn("not received within", error)
+        self.assertLess(elapsed, 3)
+
+    def test_cancel_interrupts_blocked_body_read(self):
+        """Test that cancelling the batch cuts off a body read blocked on the socket."""
+        url = self._stalled_server()
+        cancel = threading.Event()
+        scheduler = HostScheduler()
+        generator = CitationGenerator(
+            scheduler=scheduler, negative_cache=NegativeCache(), cancel=cancel
+        )
+        outcome = []
+
+        def fetch():
+            try:
+                generator._fetch_page(url)
+            except FetchCancelled:
+                outcome.append("cancelled")
+
+        worker = threading.Thread(target=fetch, daemon=True)
+        worker.start()
+        time.sleep(0.2)
+        scheduler.cancel(cancel)
+        worker.join(timeout=2)
+
+        self.assertEqual(outcome, ["cancelled"])
+
+    def _stalled_server(self):
+        """Serve one response whose close-delimited body never arrives; return its URL."""
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        stop = threading.Event()
+
+        def stall():
+            conn, _ = server.accept()
+            with conn:
+                conn.recv(4096)
+                # No Content-Length and not chunked: the body ends when the socket closes.
+                conn.sendall(b"HTTP/1.0 200 OK\r\nContent-Type: text/html\r\n\r\n")
+                stop.wait(10)
+
+        threading.Thread(target=stall, daemon=True).start()
+        self.addCleanup(server.close)
+        self.addCleanup(stop.set)
+        return f"http://127.0.0.1:{server.getsockname()[1]}/"
+
+    def test_concurrent_citations_are_recorded_safely(self):
+        """Test that concurrent generate_citation calls never see the store change mid-write."""
+        metadata = PageMetadata(title="Page", author="Jane Doe")
+        urls = [f"https://example.com/{index}" for index in range(300)]
+        interval = sys.getswitchinterval()
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            sys.setswitchinterval(1e-6)
+            try:
+                with patch.object(CitationGenerator, "_get_page_metadata", return_value=metadata):
+                    with ThreadPoolExecutor(max_workers=16) as pool:
+                        results = list(pool.map(self.generator.generate_citation, urls))
+            finally:
+                sys.setswitchinterval(interval)
+                os.chdir(cwd)
+
+        self.assertTrue(all(result.startswith("Generated HARVARD") for result in results))
+        self.assertEqual(set(self.generator.citations), set(urls))
+
     def test_author_from_domain(self):
         """Test extracting author from domain."""
         # Test basic domain
@@ -0,0 +1,184 @@
+"""Tests for the bulk citation command-line tool."""
+
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from shared.citation_generator import CitationGenerator
+from shared.cli import load_checkpoint, main, read_urls, run
+from shared.fetching import FetchCancelled, HostScheduler
+from shared.parsing import PageMetadata
+
+
+def _fake_metadata(self, url, domain, want_author):
+    if "broken" in url:
+        error = "Error fetching page: timed out"
+        return PageMetadata(title=error, author="Broken", error=error)
+    if "rust" in url:
+        return PageMetadata(title="Error handling in Rust", author="Ferris")
+    return PageMetadata(title=f"Title of {url}", author="Jane Doe" if want_author else None)
+
+
+class TestReadUrls(unittest.TestCase):
+    """Test cases for URL input parsing."""
+
+    def test_skips_blanks_comments_and_duplicates(self):
+        """Test that input order is kept and repeated URLs are cited once."""
+        lines = ["# reading list\n", "https://a.example/\n", "\n", " https://b.example/ \n"]
+        lines.append("https://a.example/\n")
+        self.assertEqual(read_urls(lines), ["https://a.example/", "https://b.example/"])
+
+
+class TestRun(unittest.TestCase):
+    """Test cases for the parallel, checkpointed run."""
+
+    def setUp(self):
+        self.generator = CitationGenerator(scheduler=HostScheduler(workers=4))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmp.name, "run.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_formats_several_styles_from_one_fetch(self):
+        """Test that every requested style is rendered from a single fetch."""
+        out = io.StringIO()
+        with patch.object(
+            CitationGenerator, "_get_page_metadata", autospec=True, side_effect=_fake_metadata
+        ) as fetch:
+            failures = run(
+                ["https://a.example/"], ["unsw", "apa"], out, "jsonl", generator=self.generator
+            )
+
+        self.assertEqual(failures, 0)
+        self.assertEqual(fetch.call_count, 1)
+        record = json.loads(out.getvalue())
+        self.assertEqual(set(record["citations"]), {"unsw", "apa"})
+        self.assertIn("Jane Doe", record["citations"]["unsw"]["reference"])
+        self.assertNotIn("<em>", record["citations"]["apa"]["reference"])
+        self.assertEqual(self.generator.citations, {})
+
+    @patch.object(CitationGenerator, "_get_page_metadata", _fake_metadata)
+    def test_resume_skips_finished_urls(self):
+        """Test that a re-run replays finished URLs from the checkpoint without fetching."""
+        urls = ["https://a.example/", "https://broken.example/"]
+        run(
+            urls[:1],
+            ["harvard"],
+            io.StringIO(),
+            checkpoint=self.checkpoint,
+            generator=self.generator,
+        )
+        with open(self.checkpoint, "a", encoding="utf-8") as file:
+            file.write('{"url": "https://torn')  # interrupted mid-write
+
+        cited = []
+        original = CitationGenerator._cite
+
+        def tracking_cite(generator, url, styles, record=True):
+            cited.append(url)
+            return original(generator, url, styles, record)
+
+        out = io.StringIO()
+        with patch.object(CitationGenerator, "_cite", tracking_cite):
+            failures = run(
+                urls, ["harvard"], out, checkpoint=self.checkpoint, generator=self.generator
+            )
+
+        self.assertEqual(cited, ["https://broken.example/"])
+        self.assertEqual(failures, 1)
+        self.assertIn("Source: https://a.example/", out.getvalue())
+        records = load_checkpoint(self.checkpoint)
+        self.assertEqual(records["https://a.example/"]["status"], "ok")
+        self.assertEqual(records["https://broken.example/"]["status"], "failed")
+
+    @patch.object(CitationGenerator, "_get_page_metadata", _fake_metadata)
+    def test_error_like_title_is_not_a_failure(self):
+        """Test that only real fetch failures, not titles starting with "Error", fail."""
+        out = io.StringIO()
+        failures = run(["https://rust.example/"], ["apa"], out, "jsonl", generator=self.generator)
+        self.assertEqual(failures, 0)
+        self.assertEqual(json.loads(out.getvalue())["status"], "ok")
+
+    @patch.object(CitationGenerator, "_get_page_metadata", _fake_metadata)
+    def test_text_output_marks_failed_fetches(self):
+        """Test that text output shows the fetch error next to the fallback citation."""
+        out = io.StringIO()
+        run(["https://broken.example/"], ["apa"], out, generator=self.generator)
+        self.assertIn("Error: Error fetching page: timed out", out.getvalue())
+
+    def test_interrupt_cancels_in_flight_fetches(self):
+        """Test that Ctrl-C cancels fetches still running instead of waiting for them."""
+        cancel = threading.Event()
+        generator = CitationGenerator(scheduler=HostScheduler(workers=4), cancel=cancel)
+
+        def fake_metadata(generator, url, domain, want_author):
+            if "slow" in url:
+                cancel.wait(10)
+                raise FetchCancelled("download cancelled")
+            return PageMetadata(title="Fast", author="Jane Doe")
+
+        class InterruptedOutput(io.StringIO):
+            def write(self, text):
+                raise KeyboardInterrupt
+
+        start = time.monotonic()
+        with patch.object(CitationGenerator, "_get_page_metadata", fake_metadata):
+            with self.assertRaises(KeyboardInterrupt):
+                run(
+                    ["https://slow.example/", "https://fast.example/"],
+                    ["apa"],
+                    InterruptedOutput(),
+                    generator=generator,
+                )
+
+        self.assertTrue(cancel.is_set())
+        self.assertLess(time.monotonic() - start, 5)
+
+    @patch.object(CitationGenerator, "_get_page_metadata", _fake_metadata)
+    def test_resume_refetches_missing_styles(self):
+        """Test that checkpoint records only replay when they hold every requested style."""
+        url = "https://a.example/"
+        run(
+            [url],
+            ["apa", "mla"],
+            io.StringIO(),
+            checkpoint=self.checkpoint,
+            generator=self.generator,
+        )
+
+        out = io.StringIO()
+        run([url], ["mla"], out, "jsonl", checkpoint=self.checkpoint, generator=self.generator)
+        self.assertEqual(set(json.loads(out.getvalue())["citations"]), {"mla"})
+
+        out = io.StringIO()
+        with patch.object(CitationGenerator, "_cite", wraps=self.generator._cite) as cite:
+            run([url], ["ieee"], out, "jsonl", checkpoint=self.checkpoint, generator=self.generator)
+        self.assertEqual(cite.call_count, 1)
+        self.assertEqual(set(json.loads(out.getvalue())["citations"]), {"ieee"})
+
+    @patch.object(CitationGenerator, "_get_page_metadata", _fake_metadata)
+    def test_main_reads_file_and_writes_output(self):
+        """Test the command-line entry point end to end."""
+        source = os.path.join(self.tmp.name, "urls.txt")
+        output = os.path.join(self.tmp.name, "out.txt")
+        with open(source, "w", encoding="utf-8") as file:
+            file.write("https://a.example/\nhttps://b.example/\n")
+
+        with patch("sys.stderr", io.StringIO()):
+            status = main([source, "--style", "mla", "--workers", "2", "--output", output])
+
+        self.assertEqual(status, 0)
+        with open(output, encoding="utf-8") as file:
+            text = file.read()
+        self.assertIn("[MLA] Reference list entry:", text)
+        self.assertEqual(text.count("Source: "), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
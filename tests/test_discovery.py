@@ -0,0 +1,238 @@
+"""Tests for link discovery from sitemaps, feeds and listing pages."""
+
+import gzip
+import time
+import unittest
+import zlib
+from contextlib import nullcontext
+from unittest.mock import Mock, patch
+
+from shared.citation_generator import CitationGenerator
+from shared.discovery import discover_links, iter_links, stream_source_citations
+from shared.fetching import CircuitBreaker, HostScheduler, NegativeCache
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc><lastmod>2024-01-01</lastmod></url>
+  <url><loc> https://example.com/b </loc></url>
+  <url><loc>https://example.com/a#section</loc></url>
+</urlset>"""
+
+IMAGE_SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url>
+    <loc>https://example.com/gallery</loc>
+    <image:image><image:loc>https://example.com/a.jpg</image:loc></image:image>
+  </url>
+</urlset>"""
+
+SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-posts.xml</loc></sitemap>
+</sitemapindex>"""
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel>
+  <title>Course readings</title><link>https://example.com/</link>
+  <item><title>One</title><link>https://news.example.org/one</link></item>
+  <item><title>Two</title><link>https://news.example.org/two</link></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <link href="https://blog.example.net/" rel="alternate"/>
+  <entry><link href="https://blog.example.net/post-1"/></entry>
+  <entry><link rel="edit" href="https://blog.example.net/edit/2"/>
+         <link rel="alternate" href="/post-2"/></entry>
+</feed>"""
+
+LISTING = b"""<html><head><title>Week 3 readings</title></head><body>
+<ul>
+  <li><a href="https://journal.example.com/article">Article</a></li>
+  <li><a href="/library/chapter-2">Chapter 2</a></li>
+  <li><a href="#top">Back to top</a></li>
+  <li><a href="mailto:tutor@example.edu">Email</a></li>
+</ul></body></html>"""
+
+
+def _chunks(data, size=7):
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+def _response(body, content_type=""):
+    response = Mock(status_code=200, headers={"Content-Type": content_type})
+    response.iter_content = Mock(return_value=iter(_chunks(body, 64)))
+    return response
+
+
+def _source(body, content_type=""):
+    return nullcontext((content_type, iter(_chunks(body, 64))))
+
+
+class TestIterLinks(unittest.TestCase):
+    """Test cases for incremental link extraction."""
+
+    def test_sitemap_parsed_from_small_chunks(self):
+        """Test that sitemap URLs are found across arbitrary chunk boundaries."""
+        links = list(iter_links(_chunks(SITEMAP), "https://example.com/sitemap.xml"))
+        self.assertEqual(
+            links,
+            [
+                ("page", "https://example.com/a"),
+                ("page", "https://example.com/b"),
+                ("page", "https://example.com/a#section"),
+            ],
+        )
+
+    def test_image_sitemap_skips_image_locs(self):
+        """Test that <image:loc> entries are not cited as pages."""
+        links = list(iter_links(_chunks(IMAGE_SITEMAP), "https://example.com/sitemap.xml"))
+        self.assertEqual(links, [("page", "https://example.com/gallery")])
+
+    def test_gzip_sitemap(self):
+        """Test that a .xml.gz sitemap is decompressed while it streams in."""
+        chunks = _chunks(gzip.compress(SITEMAP), 16)
+        links = list(iter_links(chunks, "https://example.com/sitemap.xml.gz", "application/x-gzip"))
+        self.assertEqual(
+            [url for _, url in links][:2], ["https://example.com/a", "https://example.com/b"]
+        )
+
+    def test_corrupt_gzip_raises(self):
+        """Test that a truncated or corrupt gzip stream is an error, not an empty result."""
+        corrupt = gzip.compress(SITEMAP)[:12] + b"not deflate data" * 4
+        with self.assertRaises(zlib.error):
+            list(iter_links([corrupt], "https://example.com/sitemap.xml.gz"))
+
+    def test_sitemap_index(self):
+        """Test that sitemap index entries are reported as nested sitemaps."""
+        links = list(iter_links([SITEMAP_INDEX], "https://example.com/sitemap.xml"))
+        self.assertEqual(links, [("sitemap", "https://example.com/sitemap-posts.xml")])
+
+    def test_rss_items_only(self):
+        """Test that RSS item links are found and the channel link is skipped."""
+        links = [url for _, url in iter_links(_chunks(RSS), "https://example.com/feed")]
+        self.assertEqual(links, ["https://news.example.org/one", "https://news.example.org/two"])
+
+    def test_atom_alternate_links(self):
+        """Test that Atom entries yield their alternate links, resolved against the feed."""
+        links = [url for _, url in iter_links([ATOM], "https://blog.example.net/atom.xml")]
+        self.assertEqual(
+            links, ["https://blog.example.net/post-1", "https://blog.example.net/post-2"]
+        )
+
+    def test_html_listing(self):
+        """Test that anchors in a listing page are resolved against the page URL."""
+        links = [
+            url
+            for _, url in iter_links(_chunks(LISTING), "https://uni.example.edu/week3", "text/html")
+        ]
+        self.assertIn("https://journal.example.com/article", links)
+        self.assertIn("https://uni.example.edu/library/chapter-2", links)
+
+
+class TestDiscoverLinks(unittest.TestCase):
+    """Test cases for discover_links."""
+
+    def test_dedupes_and_filters(self):
+        """Test that fragments, duplicates and non-http links are dropped."""
+        fetch = Mock(return_value=_source(LISTING + b'<a href="/library/chapter-2#p4">dup</a>'))
+        links = list(discover_links("https://uni.example.edu/week3", fetch, max_links=10))
+        self.assertEqual(
+            links,
+            ["https://journal.example.com/article", "https://uni.example.edu/library/chapter-2"],
+        )
+
+    def test_follows_sitemap_index_and_caps_links(self):
+        """Test that nested sitemaps are fetched and max_links is respected."""
+        responses = {
+            "https://example.com/sitemap.xml": _source(SITEMAP_INDEX, "application/xml"),
+            "https://example.com/sitemap-posts.xml": _source(SITEMAP, "application/xml"),
+        }
+        links = list(discover_links("https://example.com/sitemap.xml", responses.__getitem__, 1))
+        self.assertEqual(links, ["https://example.com/a"])
+
+
+class TestStreamSourceCitations(unittest.TestCase):
+    """Test cases for stream_source_citations."""
+
+    @patch("requests.get")
+    def test_streams_citations_for_discovered_links(self, mock_get):
+        """Test that every discovered link is cited and a summary event closes the stream."""
+        mock_get.return_value = _response(RSS, "application/rss+xml")
+        generator = CitationGenerator(scheduler=HostScheduler(), negative_cache=NegativeCache())
+
+        def fake_generate(url, style="harvard"):
+            generator.citations.setdefault(url, {})[style] = {
+                "intext": "(Author 2025)",
+                "reference": f"Author 2025, <em>Title</em>, {url}",
+            }
+            return "OK"
+
+        with patch.object(generator, "generate_citation", side_effect=fake_generate):
+            events = list(
+                stream_source_citations(generator, "https://example.com/feed", "unsw", 10)
+            )
+
+        citations = [event for event in events if event["event"] == "citation"]
+        self.assertCountEqual(
+            [event["url"] for event in citations],
+            ["https://news.example.org/one", "https://news.example.org/two"],
+        )
+        self.assertEqual(events[-1], {"event": "done", "discovered": 2, "completed": 2})
+
+    @patch("requests.get")
+    def test_source_failure_reported(self, mock_get):
+        """Test that an unreadable source produces an error event instead of raising."""
+        response = _response(b"")
+        response.raise_for_status.side_effect = Exception("404 Not Found")
+        mock_get.return_value = response
+        generator = CitationGenerator(scheduler=HostScheduler(), negative_cache=NegativeCache())
+
+        events = list(stream_source_citations(generator, "https://example.com/missing", "apa", 10))
+
+        self.assertEqual(events[0]["event"], "error")
+        self.assertIn("404", events[0]["message"])
+        self.assertEqual(events[-1], {"event": "done", "discovered": 0, "completed": 0})
+
+    @patch("requests.get")
+    def test_source_read_closes_half_open_circuit(self, mock_get):
+        """Test that reading the source reports its outcome, releasing a half-open trial."""
+        mock_get.return_value = _response(RSS, "application/rss+xml")
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure("example.com")
+        generator = CitationGenerator(
+            scheduler=HostScheduler(breaker=breaker), negative_cache=NegativeCache()
+        )
+
+        with patch.object(generator, "generate_citation", return_value="OK"):
+            events = list(stream_source_citations(generator, "https://example.com/feed", "apa", 10))
+
+        self.assertEqual(events[-1]["discovered"], 2)
+        self.assertTrue(breaker.allow("example.com"))
+        self.assertTrue(breaker.allow("example.com"))
+
+    @patch("shared.citation_generator.FETCH_BODY_TIMEOUT", 0.05)
+    @patch("requests.get")
+    def test_stalled_source_hits_download_deadline(self, mock_get):
+        """Test that a source that stops sending is cut off and reported as an error."""
+
+        def trickle(chunk_size):
+            yield RSS[:40]
+            while True:
+                time.sleep(0.02)
+                yield b" "
+
+        response = Mock(status_code=200, headers={"Content-Type": "application/rss+xml"})
+        response.iter_content = trickle
+        mock_get.return_value = response
+        generator = CitationGenerator(scheduler=HostScheduler(), negative_cache=NegativeCache())
+
+        events = list(stream_source_citations(generator, "https://example.com/feed", "apa", 10))
+
+        self.assertEqual(events[0]["event"], "error")
+        self.assertIn("not received within", events[0]["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,267 @@
+"""Tests for the host-aware fetch scheduler."""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from shared.fetching import (
+    CircuitBreaker,
+    FetchCancelled,
+    FetchSkipped,
+    HostScheduler,
+    NegativeCache,
+    parse_retry_after,
+)
+
+
+def _response(status_code, headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    """Test cases for Retry-After parsing."""
+
+    def test_seconds(self):
+        """Test delta-seconds values."""
+        self.assertEqual(parse_retry_after("7"), 7.0)
+
+    def test_http_date_in_past(self):
+        """Test that past HTTP dates mean no wait."""
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+
+    def test_invalid(self):
+        """Test missing or malformed headers."""
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class TestHostScheduler(unittest.TestCase):
+    """Test cases for HostScheduler."""
+
+    @patch("requests.get")
+    def test_retries_throttled_response_and_halves_limit(self, mock_get):
+        """Test that a 429 is retried after Retry-After and shrinks the host limit."""
+        mock_get.side_effect = [_response(429, {"Retry-After": "0"}), _response(200)]
+        scheduler = HostScheduler(host_max_concurrency=4, host_initial_concurrency=4)
+
+        response = scheduler.fetch("https://example.com/a")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(scheduler.host_limit("example.com"), 2)
+
+    @patch("requests.get")
+    def test_gives_up_after_max_retries(self, mock_get):
+        """Test that persistent throttling returns the last response."""
+        mock_get.return_value = _response(503, {"Retry-After": "0"})
+        scheduler = HostScheduler(max_retries=2)
+
+        response = scheduler.fetch("https://example.com/a")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(mock_get.call_count, 3)
+
+    @patch("requests.get")
+    def test_long_retry_after_is_not_retried_early(self, mock_get):
+        """Test that a Retry-After beyond MAX_RETRY_AFTER returns the throttled response at once."""
+        mock_get.return_value = _response(429, {"Retry-After": "3600"})
+        scheduler = HostScheduler(max_retries=3)
+
+        start = time.monotonic()
+        response = scheduler.fetch("https://example.com/a")
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    @patch("requests.get")
+    def test_idle_hosts_are_evicted(self, mock_get):
+        """Test that scheduler and breaker state for unused hosts is dropped."""
+        mock_get.side_effect = requests.ConnectionError("refused")
+        breaker = CircuitBreaker(failure_threshold=5, idle_ttl=0.05)
+        scheduler = HostScheduler(breaker=breaker, idle_ttl=0.05)
+        for index in range(3):
+            with self.assertRaises(requests.ConnectionError):
+                scheduler.fetch(f"https://host{index}.example/")
+
+        time.sleep(0.06)
+        with self.assertRaises(requests.ConnectionError):
+            scheduler.fetch("https://last.example/")
+
+        self.assertEqual(list(scheduler._hosts), ["last.example"])
+        self.assertEqual(list(breaker._failures), ["last.example"])
+
+    @patch("requests.get")
+    def test_successes_grow_limit_up_to_cap(self, mock_get):
+        """Test additive increase of the host limit."""
+        mock_get.return_value = _response(200)
+        scheduler = HostScheduler(host_max_concurrency=3, host_initial_concurrency=1)
+
+        for _ in range(10):
+            scheduler.fetch("https://example.com/a")
+
+        self.assertEqual(scheduler.host_limit("example.com"), 3)
+
+    def test_round_robin_across_hosts(self):
+        """Test that a batch dominated by one host still interleaves other hosts."""
+        scheduler = HostScheduler(workers=1)
+        urls = [f"https://big.example/{i}" for i in range(4)] + ["https://small.example/1"]
+        order = [url for url, _ in scheduler.run(urls, lambda url: url)]
+        self.assertEqual(order[:2], ["https://big.example/0", "https://small.example/1"])
+        self.assertCountEqual(order, urls)
+
+    def test_per_host_concurrency_cap(self):
+        """Test that no host exceeds its concurrency limit within a batch."""
+        scheduler = HostScheduler(workers=8, host_max_concurrency=2, host_initial_concurrency=2)
+        lock = threading.Lock()
+        current = {"n": 0, "max": 0}
+
+        def work(url):
+            with lock:
+                current["n"] += 1
+                current["max"] = max(current["max"], current["n"])
+            time.sleep(0.01)
+            with lock:
+                current["n"] -= 1
+            return url
+
+        urls = [f"https://example.com/{i}" for i in range(10)]
+        results = {url: future.result() for url, future in scheduler.run(urls, work)}
+
+        self.assertEqual(set(results), set(urls))
+        self.assertLessEqual(current["max"], 2)
+
+
+class TestCancellation(unittest.TestCase):
+    """Test cases for cancelling fetches when a batch deadline expires."""
+
+    @patch("requests.get")
+    def test_cancelled_fetch_skips_network(self, mock_get):
+        """Test that no request is sent once the cancel event is set."""
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(FetchCancelled):
+            HostScheduler().fetch("https://example.com/", cancel=cancel)
+        mock_get.assert_not_called()
+
+    @patch("requests.get")
+    def test_cancel_wakes_fetch_waiting_on_backoff(self, mock_get):
+        """Test that a fetch blocked behind Retry-After gives up as soon as it is cancelled."""
+        scheduler = HostScheduler(breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0))
+        scheduler.acquire("slow.example")
+        scheduler.release("slow.example", throttled=True, delay=30)
+        cancel = threading.Event()
+        outcome = []
+
+        def fetch():
+            try:
+                scheduler.fetch("https://slow.example/", cancel=cancel)
+            except FetchCancelled:
+                outcome.append("cancelled")
+
+        worker = threading.Thread(target=fetch)
+        worker.start()
+        time.sleep(0.05)
+        scheduler.cancel(cancel)
+        worker.join(timeout=1)
+
+        self.assertEqual(outcome, ["cancelled"])
+        mock_get.assert_not_called()
+
+    def test_interrupted_run_cancels_before_waiting_for_workers(self):
+        """Test that Ctrl-C inside a batch cancels it before the worker pool is joined."""
+        scheduler = HostScheduler(workers=2)
+        cancel = threading.Event()
+        finished = []
+
+        def slow(url):
+            finished.append(cancel.wait(10))
+
+        with patch.object(scheduler._cond, "wait", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                list(scheduler.run(["https://slow.example/"], slow, cancel=cancel))
+
+        self.assertEqual(finished, [True])
+
+    def test_abandoned_trial_frees_half_open_slot(self):
+        """Test that a half-open trial that was never sent can be retried."""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure("dead.example")
+        self.assertTrue(breaker.allow("dead.example"))
+        breaker.abandon("dead.example")
+        self.assertTrue(breaker.allow("dead.example"))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker and its use by HostScheduler."""
+
+    def test_opens_after_threshold_and_half_opens(self):
+        """Test open, half-open trial and close transitions."""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        breaker.record_failure("dead.example")
+        self.assertTrue(breaker.allow("dead.example"))
+        breaker.record_failure("dead.example")
+        self.assertFalse(breaker.allow("dead.example"))
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow("dead.example"))  # single trial request
+        self.assertFalse(breaker.allow("dead.example"))
+        breaker.record_success("dead.example")
+        self.assertTrue(breaker.allow("dead.example"))
+
+    @patch("requests.get")
+    def test_open_circuit_skips_network(self, mock_get):
+        """Test that repeated timeouts stop further requests to the host."""
+        mock_get.side_effect = requests.Timeout("timed out")
+        scheduler = HostScheduler(breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+
+        for _ in range(2):
+            with self.assertRaises(requests.Timeout):
+                scheduler.fetch("https://dead.example/page")
+        with self.assertRaises(FetchSkipped):
+            scheduler.fetch("https://dead.example/other")
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.get")
+    def test_streamed_fetch_defers_to_body_outcome(self, mock_get):
+        """Test that a streamed response only closes the circuit once its body is read."""
+        mock_get.return_value = _response(200)
+        breaker = CircuitBreaker(failure_threshold=2)
+        scheduler = HostScheduler(breaker=breaker)
+
+        for _ in range(2):
+            scheduler.fetch("https://tarpit.example/", stream=True)
+            scheduler.record_body("https://tarpit.example/", requests.ConnectionError("stalled"))
+
+        self.assertTrue(breaker.is_open("tarpit.example"))
+
+
+class TestNegativeCache(unittest.TestCase):
+    """Test cases for NegativeCache."""
+
+    def test_entries_expire(self):
+        """Test that cached failures are forgotten after the TTL."""
+        cache = NegativeCache(ttl=0.05)
+        cache.put("https://example.com", "Error fetching page: boom")
+        self.assertEqual(cache.get("https://example.com"), "Error fetching page: boom")
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("https://example.com"))
+
+    def test_bounded_size(self):
+        """Test that the oldest entries are evicted first."""
+        cache = NegativeCache(ttl=60, max_entries=2)
+        for index in range(3):
+            cache.put(f"https://example.com/{index}", "error")
+        self.assertIsNone(cache.get("https://example.com/0"))
+        self.assertIsNotNone(cache.get("https://example.com/2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+"""Tests for the memory budget and per-page memory ceilings."""
+
+import gc
+import threading
+import time
+import tracemalloc
+import unittest
+from unittest.mock import Mock, patch
+
+from shared.citation_generator import CitationGenerator
+from shared.fetching import FetchCancelled, HostScheduler, NegativeCache
+from shared.memory import MemoryBudget, Reservation, page_reservation
+from shared.parsing import ParsePool, make_soup, parse_page_metadata
+
+PARAGRAPH = b"<div class='story'><p>Findings on coastal erosion and sediment transport.</p></div>\n"
+
+
+def _large_page(size_bytes):
+    body = PARAGRAPH * (size_bytes // len(PARAGRAPH))
+    return (
+        b'<html><head><title>Large Report</title><meta name="author" content="Research Desk">'
+        b"</head><body>" + body + b"</body></html>"
+    )
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """Test cases for MemoryBudget admission control."""
+
+    def test_blocks_when_exhausted(self):
+        """Test that admissions wait until enough budget is released."""
+        budget = MemoryBudget(limit_bytes=100)
+        self.assertTrue(budget.acquire(80))
+        self.assertFalse(budget.acquire(30, timeout=0.01))
+
+        releaser = threading.Timer(0.05, budget.release, args=(80,))
+        releaser.start()
+        self.assertTrue(budget.acquire(30, timeout=5))
+        releaser.join()
+        self.assertEqual(budget.in_use, 30)
+
+    def test_oversized_request_admitted_when_idle(self):
+        """Test that a reservation larger than the budget cannot deadlock."""
+        budget = MemoryBudget(limit_bytes=100)
+        self.assertTrue(budget.acquire(500, timeout=0.01))
+
+    def test_cancel_wakes_waiting_reservation(self):
+        """Test that a reservation queued behind the budget gives up when its batch is cancelled."""
+        budget = MemoryBudget(limit_bytes=100)
+        budget.acquire(80)
+        cancel = threading.Event()
+        outcome = []
+
+        def reserve():
+            try:
+                with Reservation(budget, 30, cancel):
+                    outcome.append("reserved")
+            except FetchCancelled:
+                outcome.append("cancelled")
+
+        worker = threading.Thread(target=reserve, daemon=True)
+        worker.start()
+        time.sleep(0.05)
+        HostScheduler().cancel(cancel)
+        worker.join(timeout=1)
+
+        self.assertEqual(outcome, ["cancelled"])
+        self.assertEqual(budget.in_use, 80)
+
+    def test_reservation_resizes_and_releases(self):
+        """Test that a reservation can grow without blocking and is returned on exit."""
+        budget = MemoryBudget(limit_bytes=100)
+        with Reservation(budget, 60) as reservation:
+            reservation.resize(150)
+            self.assertEqual(budget.in_use, 150)
+        self.assertEqual(budget.in_use, 0)
+
+
+class TestPageMemoryCeiling(unittest.TestCase):
+    """tracemalloc-based ceilings on memory used while extracting one page."""
+
+    def _measure(self, content, backend):
+        parse_page_metadata(content, "example.com", backend=backend)  # warm up imports
+        gc.collect()
+        gc.disable()  # freed memory must not depend on the cyclic collector
+        tracemalloc.start()
+        try:
+            metadata = parse_page_metadata(content, "example.com", backend=backend)
+            retained, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+            gc.enable()
+        self.assertEqual(metadata.author, "Research Desk")
+        return retained, peak
+
+    def test_peak_within_reservation_and_tree_released(self):
+        """Test that parsing stays within the budgeted estimate and frees the tree."""
+        content = _large_page(512 * 1024)
+        for backend in ("html.parser", "lxml", "fast"):
+            with self.subTest(backend=backend):
+                retained, peak = self._measure(content, backend)
+                self.assertLessEqual(peak, page_reservation(len(content)))
+                self.assertLess(retained, len(content) // 4)
+
+
+class TestGeneratorBudget(unittest.TestCase):
+    """Test the generator's use of the memory budget while fetching."""
+
+    @patch("requests.get")
+    def test_reservation_covers_fetch_and_is_released(self, mock_get):
+        """Test that the reservation tracks Content-Length and is released afterwards."""
+        content = _large_page(64 * 1024)
+        budget = MemoryBudget(limit_bytes=10 * 1024 * 1024)
+        observed = []
+
+        def iter_content(chunk_size):
+            observed.append(budget.in_use)
+            yield content
+
+        response = Mock(status_code=200, headers={"Content-Length": str(len(content))})
+        response.iter_content = iter_content
+        mock_get.return_value = response
+
+        generator = CitationGenerator(
+            parse_pool=ParsePool(workers=0),
+            scheduler=HostScheduler(),
+            negative_cache=NegativeCache(),
+            memory_budget=budget,
+        )
+        metadata = generator._get_page_metadata("https://example.com/a", "example.com", True)
+
+        self.assertEqual(metadata.author, "Research Desk")
+        self.assertEqual(observed, [page_reservation(len(content))])
+        self.assertEqual(budget.in_use, 0)
+        response.close.assert_called_once()
+
+    @patch("requests.get")
+    def test_no_reservation_for_urls_that_will_not_be_fetched(self, mock_get):
+        """Test that cached failures and open circuits return without touching the budget."""
+        budget = Mock(wraps=MemoryBudget(limit_bytes=1024))
+        negative_cache = NegativeCache()
+        negative_cache.put("https://failed.example/", "Error fetching page: 404")
+        scheduler = HostScheduler()
+        scheduler.breaker._opened_until["down.example"] = float("inf")
+        generator = CitationGenerator(
+            scheduler=scheduler, negative_cache=negative_cache, memory_budget=budget
+        )
+
+        metadata = generator._get_page_metadata("https://failed.example/", "failed.example", True)
+        title, soup = generator.get_page_content("https://down.example/")
+
+        self.assertEqual(metadata.error, "Error fetching page: 404")
+        self.assertIn("circuit open", title)
+        self.assertIsNone(soup)
+        budget.acquire.assert_not_called()
+        mock_get.assert_not_called()
+
+    @patch("requests.get")
+    def test_page_content_is_reserved_while_parsing(self, mock_get):
+        """Test that get_page_content holds a reservation through the fetch and parse."""
+        content = _large_page(16 * 1024)
+        budget = MemoryBudget(limit_bytes=10 * 1024 * 1024)
+        observed = []
+        response = Mock(status_code=200, headers={"Content-Length": str(len(content))})
+        response.iter_content = Mock(return_value=iter([content]))
+        mock_get.return_value = response
+        generator = CitationGenerator(
+            scheduler=HostScheduler(), negative_cache=NegativeCache(), memory_budget=budget
+        )
+
+        def tracked_make_soup(body, backend):
+            observed.append(budget.in_use)
+            return make_soup(body, backend)
+
+        with patch("shared.citation_generator.make_soup", side_effect=tracked_make_soup):
+            title, _ = generator.get_page_content("https://example.com/report")
+
+        self.assertEqual(title, "Large Report")
+        self.assertEqual(observed, [page_reservation(len(content))])
+        self.assertEqual(budget.in_use, 0)
+
+    @patch("shared.citation_generator.MAX_PAGE_BYTES", 1024)
+    @patch("requests.get")
+    def test_body_truncated_at_max_page_size(self, mock_get):
+        """Test that oversized bodies stop streaming at MAX_PAGE_BYTES."""
+        response = Mock(status_code=200, headers={})
+        response.iter_content = Mock(return_value=iter([b"a" * 700, b"b" * 700, b"c" * 700]))
+        mock_get.return_value = response
+
+        generator = CitationGenerator(scheduler=HostScheduler(), negative_cache=NegativeCache())
+        body, error = generator._fetch_page("https://example.com/big")
+
+        self.assertEqual(error, "")
+        self.assertEqual(len(body), 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
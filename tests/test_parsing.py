@@ -0,0 +1,129 @@
+"""Tests for the HTML parsing stage and its process pool."""
+
+import pickle
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from shared.parsing import PARSER_BACKENDS, PageMetadata, ParsePool, parse_page_metadata
+
+FIXTURES = Path(__file__).parent / "fixtures" / "pages"
+
+EXPECTED_METADATA = {
+    "article_author.html": ("Reef Bleaching Survey Results", "Marine Science Today"),
+    "author_class.html": ("Local Election Preview", "Daniel Moreau"),
+    "byline_role.html": ("Council Approves New Bike Lanes", "Hannah Lee"),
+    "byline_simple.html": ("A Short History of the Printing Press", "Thomas Reid"),
+    "json_ld_author.html": ("Understanding Inflation & Interest Rates", "Marcus Bell"),
+    "json_ld_publisher.html": ("Annual Report 2024", "Australian Bureau of Statistics"),
+    "link_author.html": ("Notes on Distributed Consensus", "Lena Okafor"),
+    "meta_author.html": ("Housing Affordability in Sydney", "Priya Natarajan"),
+    "no_metadata.html": ("Plain Page", "Example (Organisation)"),
+    "no_title.html": ("No Title Found", "Anonymous Collective"),
+    "org_class.html": ("Volunteer Program", "Harbour City Food Bank"),
+    "utf8_no_charset.html": ("Café — naïve questions about crème brûlée", "José Müller"),
+    "written_by.html": ("Gardening in Small Spaces", "Olivia Chen"),
+}
+
+SAMPLE_PAGE = (
+    b"<html><head><title> Sample Article </title>"
+    b'<meta name="author" content="Jane Citizen"></head>'
+    b"<body><p>Body text</p></body></html>"
+)
+
+
+class TestParsePageMetadata(unittest.TestCase):
+    """Test cases for parse_page_metadata."""
+
+    def test_extracts_title_and_author(self):
+        """Test title and author extraction from raw bytes."""
+        metadata = parse_page_metadata(SAMPLE_PAGE, "example.com")
+        self.assertEqual(metadata, PageMetadata(title="Sample Article", author="Jane Citizen"))
+
+    def test_skips_author_when_not_requested(self):
+        """Test that author extraction can be skipped."""
+        metadata = parse_page_metadata(SAMPLE_PAGE, "example.com", want_author=False)
+        self.assertIsNone(metadata.author)
+
+    def test_metadata_is_picklable(self):
+        """Test that metadata records survive a round trip across processes."""
+        metadata = PageMetadata(title="Title", author="Author")
+        self.assertEqual(pickle.loads(pickle.dumps(metadata)), metadata)
+
+
+class TestParserBackends(unittest.TestCase):
+    """Test that every parser backend extracts the same metadata."""
+
+    def test_fixture_corpus(self):
+        """Test each fixture page against every backend."""
+        for name, (title, author) in EXPECTED_METADATA.items():
+            content = (FIXTURES / name).read_bytes()
+            for backend in PARSER_BACKENDS:
+                with self.subTest(page=name, backend=backend):
+                    metadata = parse_page_metadata(content, "www.example.org", backend=backend)
+                    self.assertEqual(metadata, PageMetadata(title=title, author=author))
+
+    def test_fast_backend_without_author(self):
+        """Test that the fast path can return only the title."""
+        content = (FIXTURES / "byline_role.html").read_bytes()
+        metadata = parse_page_metadata(content, "example.org", want_author=False, backend="fast")
+        self.assertEqual(metadata, PageMetadata(title="Council Approves New Bike Lanes"))
+
+    def test_fast_backend_empty_document(self):
+        """Test that documents lxml rejects still parse via BeautifulSoup."""
+        metadata = parse_page_metadata(b"", "example.org", backend="fast")
+        expected = PageMetadata(title="No Title Found", author="Example (Organisation)")
+        self.assertEqual(metadata, expected)
+
+    def test_tree_released_when_author_heuristics_fail(self):
+        """Test that the parse tree is released even if author extraction raises."""
+        for backend in ("html.parser", "fast"):
+            with self.subTest(backend=backend):
+                with (
+                    patch("shared.parsing.determine_author", side_effect=RuntimeError("boom")),
+                    patch("shared.parsing.release_soup") as release,
+                ):
+                    with self.assertRaises(RuntimeError):
+                        parse_page_metadata(
+                            b"<p>no head metadata</p>", "example.com", backend=backend
+                        )
+                release.assert_called_once()
+
+    def test_parsing_does_not_build_a_generator(self):
+        """Test that parsing runs the author heuristics without a CitationGenerator."""
+        with patch("shared.citation_generator.CitationGenerator.__init__") as init:
+            for backend in PARSER_BACKENDS:
+                parse_page_metadata(
+                    (FIXTURES / "byline_role.html").read_bytes(), "a.org", backend=backend
+                )
+        init.assert_not_called()
+
+    def test_unknown_backend(self):
+        """Test that a misconfigured backend fails loudly."""
+        with self.assertRaises(ValueError):
+            parse_page_metadata(SAMPLE_PAGE, "example.com", backend="html5lib")
+
+
+class TestParsePool(unittest.TestCase):
+    """Test cases for ParsePool dispatch."""
+
+    def test_small_pages_parse_in_process(self):
+        """Test that pages below the threshold never start worker processes."""
+        pool = ParsePool(workers=2, min_bytes=len(SAMPLE_PAGE) + 1)
+        metadata = pool.parse(SAMPLE_PAGE, "example.com")
+        self.assertEqual(metadata.title, "Sample Article")
+        self.assertIsNone(pool._executor)
+
+    def test_large_pages_parse_in_worker(self):
+        """Test that the worker process returns the same metadata as in-process parsing."""
+        pool = ParsePool(workers=1, min_bytes=0)
+        try:
+            metadata = pool.parse(SAMPLE_PAGE, "example.com")
+            self.assertIsNotNone(pool._executor)
+        finally:
+            pool.shutdown()
+        self.assertEqual(metadata, parse_page_metadata(SAMPLE_PAGE, "example.com"))
+
+
+if __name__ == "__main__":
+    unittest.main()
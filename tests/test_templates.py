@@ -0,0 +1,79 @@
+"""Tests for the client-side style templates."""
+
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from shared.citation_generator import CitationGenerator
+from shared.parsing import NO_TITLE, PageMetadata
+from shared.templates import STYLE_TEMPLATES, known_title, render_citation, style_templates
+
+ACCESS_DATES = [datetime(2025, 3, 4, 10, 30), datetime(2024, 12, 25)]
+
+PAGES = [
+    ("https://www.abc.net.au/news/story", "Flood Warnings Issued", "Abc"),
+    ("https://www.health.gov.au/topics", "Health Topics & Advice", "Health (Government)"),
+    ("https://www.unsw.edu.au/research", NO_TITLE, "Unsw (University)"),
+    ("https://example.org/page", "Error fetching page: timed out", "Example (Organisation)"),
+    ("https://plain.example.com/a?b=c", 'Title with "quotes"', "Jane Doe"),
+]
+
+
+class TestStyleTemplates(unittest.TestCase):
+    """Test cases for template rendering."""
+
+    def setUp(self):
+        self.generator = CitationGenerator()
+
+    def test_templates_match_formatters(self):
+        """Test that every style renders exactly like its _format_* method."""
+        for style in STYLE_TEMPLATES:
+            for url, title, author in PAGES:
+                for access_date in ACCESS_DATES:
+                    with self.subTest(style=style, url=url, date=access_date):
+                        metadata = PageMetadata(title=title, author=author)
+                        with (
+                            patch.object(
+                                CitationGenerator, "_get_page_metadata", return_value=metadata
+                            ),
+                            patch.object(
+                                CitationGenerator, "_get_access_date", return_value=access_date
+                            ),
+                        ):
+                            record = self.generator._metadata_record(url)
+                            _, expected = self.generator._format_citation(
+                                style, metadata, record["domain"], url, access_date
+                            )
+                        self.assertEqual(render_citation(style, record), expected)
+
+    def test_unknown_style_falls_back_to_harvard(self):
+        """Test the same Harvard fallback as generate_citation."""
+        record = {"url": "https://a.example/", "title": "A", "domain": "a.example"}
+        record["accessed"] = "2025-03-04"
+        self.assertEqual(render_citation("turabian", record), render_citation("harvard", record))
+
+    def test_metadata_record_fields(self):
+        """Test the structured record built for a failed fetch."""
+        error = "Error fetching page: timed out"
+        metadata = PageMetadata(title=error, author="Health (Government)", error=error)
+        with patch.object(CitationGenerator, "_get_page_metadata", return_value=metadata):
+            record = self.generator._metadata_record("https://www.health.gov.au/topics")
+
+        self.assertIsNone(record["title"])
+        self.assertEqual(record["error"], "Error fetching page: timed out")
+        self.assertEqual(record["sponsor"], "Government")
+        self.assertEqual(record["domain"], "www.health.gov.au")
+        self.assertFalse(record["partial"])
+
+    def test_definition_is_versioned(self):
+        """Test the served definition and the unknown-title rule."""
+        definition = style_templates()
+        self.assertIsInstance(definition["version"], int)
+        self.assertEqual(set(definition["styles"]), set(STYLE_TEMPLATES))
+        self.assertIsNone(known_title(NO_TITLE))
+        self.assertIsNone(known_title("Errors of Fact"))  # same rule as the formatters
+        self.assertEqual(known_title("Plain"), "Plain")
+
+
+if __name__ == "__main__":
+    unittest.main()